@@ -0,0 +1,173 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from app import db, profiling
+
+# Sentinel supaya hasil None (misal 404) juga bisa di-cache
+MISSING = object()
+
+
+class TTLCache:
+    """LRU cache dengan batas ukuran + TTL per entry, plus counter hit/miss."""
+
+    def __init__(self, maxsize=1024, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return MISSING
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """
+    Request paralel dengan key yang sama cuma menjalankan satu panggilan DB;
+    sisanya menunggu hasil dari panggilan yang sedang jalan.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            # Jalan sebagai Task sendiri: kalau client pertama disconnect,
+            # request lain yang ikut menunggu tidak ikut ter-cancel
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"in_flight": len(self._inflight), "calls": self.calls, "coalesced": self.coalesced}
+
+
+class DataVersion:
+    """
+    Versi data graph yang ditulis ETL / worker Wikidata ke node
+    (:GraphMeta {key: 'graph'}) lewat utils/graph_meta.py.
+
+    Dibaca ulang dari Neo4j paling sering tiap `poll_interval` detik,
+    jadi request biasa tidak perlu round trip tambahan.
+    """
+
+    QUERY = "MATCH (m:GraphMeta {key: 'graph'}) RETURN m.data_version AS version"
+
+    def __init__(self, poll_interval=5.0):
+        self.poll_interval = poll_interval
+        self.value = 0
+        self._checked_at = None
+        self._listeners = []
+
+    def on_change(self, callback):
+        """Daftarkan callback(version) yang dipanggil tiap versi berubah."""
+        self._listeners.append(callback)
+        return callback
+
+    async def get(self):
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.poll_interval:
+            # Set dulu biar request paralel tidak ikut nge-poll barengan
+            self._checked_at = now
+            try:
+                version = await db.read(self.fetch_data_version)
+            except Exception as e:
+                print(f"Data version poll error: {e}")
+                return self.value
+            if version != self.value:
+                self.value = version
+                for callback in self._listeners:
+                    callback(version)
+        return self.value
+
+    @classmethod
+    async def fetch_data_version(cls, tx):
+        cursor = await tx.run(cls.QUERY)
+        record = await cursor.single()
+        return (record["version"] if record else None) or 0
+
+
+entity_cache = TTLCache(
+    maxsize=int(os.getenv("ENTITY_CACHE_SIZE", "5000")),
+    ttl=float(os.getenv("ENTITY_CACHE_TTL", "600")),
+)
+search_cache = TTLCache(
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "2000")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "300")),
+)
+inflight = SingleFlight()
+data_version = DataVersion(poll_interval=float(os.getenv("DATA_VERSION_POLL_SECONDS", "5")))
+
+# Entry versi lama tidak akan pernah kena lagi, buang sekalian biar slot LRU lega
+data_version.on_change(lambda version: entity_cache.clear())
+data_version.on_change(lambda version: search_cache.clear())
+
+
+async def cached_call(name, fn, *args, cache=entity_cache):
+    """Read-through: key = (data version, nama endpoint, argumen)."""
+    if profiling.active():
+        # Mode profiling harus benar-benar menjalankan query-nya
+        return await fn(*args)
+    version = await data_version.get()
+    key = (version, name) + args
+    value = cache.get(key)
+    if value is MISSING:
+        value = await inflight.do(key, lambda: fn(*args))
+        cache.set(key, value)
+    return value
+
+
+async def cached_read(name, work, *args, cache=entity_cache):
+    """Sama seperti cached_call, untuk transaction function (dijalankan via db.read)."""
+    return await cached_call(name, lambda *a: db.read(work, *a), *args, cache=cache)
+
+
+def normalize_query(q):
+    return " ".join(q.lower().split())
@@ -0,0 +1,121 @@
+from neo4j import AsyncGraphDatabase
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from app.metrics import InstrumentedTx
+
+load_dotenv()
+
+uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+username = os.getenv("NEO4J_USERNAME", "neo4j")
+password = os.getenv("NEO4J_PASSWORD", "password")
+
+# Tuning connection pool (default sama dengan default driver Neo4j)
+POOL_CONFIG = {
+    "max_connection_pool_size": int(os.getenv("NEO4J_MAX_POOL_SIZE", "100")),
+    "connection_acquisition_timeout": float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60")),
+    "max_connection_lifetime": float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600")),
+}
+# Jumlah koneksi yang dibuka duluan saat startup (0 = warmup dimatikan)
+WARMUP_CONNECTIONS = int(os.getenv("NEO4J_WARMUP_CONNECTIONS", "4"))
+
+WARMUP_QUERIES = {
+    "fulltext search_art": """
+        CALL db.index.fulltext.queryNodes("search_art", "a~") YIELD node
+        WITH node LIMIT 10
+        RETURN count(node) AS n
+    """,
+    "vector art_embeddings_index": """
+        MATCH (a:Artwork) WHERE a.embedding IS NOT NULL
+        WITH a LIMIT 1
+        CALL db.index.vector.queryNodes('art_embeddings_index', 6, a.embedding) YIELD node
+        RETURN count(node) AS n
+    """,
+    "constraint artist_uniq": "MATCH (a:Artist {original_name: $probe}) RETURN count(a) AS n",
+    "constraint artwork_uniq": "MATCH (a:Artwork {id: -1}) RETURN count(a) AS n",
+    "index year": "MATCH (y:Year {value: -1}) RETURN count(y) AS n",
+}
+
+# Driver dibuat & ditutup lewat lifespan FastAPI (lihat app/main.py),
+# bukan saat import, supaya satu worker bisa pakai satu pool async.
+driver = None
+
+
+async def init_driver():
+    global driver
+    if driver is None:
+        driver = AsyncGraphDatabase.driver(uri, auth=(username, password), **POOL_CONFIG)
+    return driver
+
+
+async def close_driver():
+    global driver
+    if driver is not None:
+        await driver.close()
+        driver = None
+
+
+async def _open_connections(count):
+    # Tahan `count` transaksi bersamaan supaya pool benar-benar membuka
+    # `count` koneksi (TLS handshake + routing table dibayar di sini, bukan
+    # oleh request user pertama setelah deploy)
+    opened = 0
+    all_open = asyncio.Event()
+
+    async def hold():
+        nonlocal opened
+        async with get_driver().session() as session:
+            tx = await session.begin_transaction()
+            try:
+                await (await tx.run("RETURN 1")).consume()
+                opened += 1
+                if opened == count:
+                    all_open.set()
+                await asyncio.wait_for(all_open.wait(), timeout=10)
+            finally:
+                await tx.close()
+
+    results = await asyncio.gather(*[hold() for _ in range(count)], return_exceptions=True)
+    return sum(1 for r in results if not isinstance(r, Exception))
+
+
+async def warmup():
+    """Verifikasi koneksi, buka pool, lalu panaskan index yang dipakai endpoint."""
+    if WARMUP_CONNECTIONS <= 0:
+        return
+    start = time.perf_counter()
+    await get_driver().verify_connectivity()
+    opened = await _open_connections(WARMUP_CONNECTIONS)
+
+    async def run_warmup_query(tx, query):
+        await (await tx.run(query, probe="")).consume()
+
+    for name, query in WARMUP_QUERIES.items():
+        try:
+            await read(run_warmup_query, query)
+        except Exception as e:
+            # Index mungkin belum ada (DB baru / ETL belum jalan), jangan gagalkan startup
+            print(f"Warmup '{name}' dilewati: {e}")
+    print(f"Neo4j warmup selesai: {opened} koneksi dibuka dalam {time.perf_counter() - start:.2f}s")
+
+
+def get_driver():
+    if driver is None:
+        raise RuntimeError("Neo4j driver belum di-init. Jalankan init_driver() dulu (lifespan).")
+    return driver
+
+
+async def read(work, *args, **kwargs):
+    """
+    Jalankan transaction function `work` di dalam managed read transaction.
+    Tx dibungkus InstrumentedTx supaya latency & ResultSummary tiap query
+    tercatat di /metrics dengan label nama service function-nya.
+    """
+    name = getattr(work, "__name__", "query")
+
+    async def instrumented(tx):
+        return await work(InstrumentedTx(tx, name), *args, **kwargs)
+
+    async with get_driver().session() as session:
+        return await session.execute_read(instrumented)
@@ -0,0 +1,223 @@
+"""
+Index embedding in-process (memory-mapped) untuk similarity & query semantik.
+
+Embedding MiniLM (384 dim) yang ditulis `import_artworks` di-export sekali
+dari Neo4j ke file .npy yang contiguous:
+
+    <dir>/meta.json          -> dtype, dimensi, jumlah baris
+    <dir>/ids.npy            -> int64, id Artwork (urut naik)
+    <dir>/vectors.npy        -> float32 / float16 / int8, sudah dinormalisasi (unit norm)
+    <dir>/scales.npy         -> float32 per baris (khusus int8)
+
+File dibuka pakai mmap_mode='r', jadi semua worker uvicorn di satu mesin
+berbagi page cache yang sama. Top-k dihitung pakai perkalian matriks NumPy
+per blok baris, tanpa round trip ke vector index Neo4j.
+
+Export:
+    python -m app.embedding_index export --out data/embeddings --dtype float16
+"""
+import argparse
+import json
+import os
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+
+
+class EmbeddingIndex:
+    def __init__(self, ids, vectors, scales=None, block_rows=16384):
+        self.ids = ids
+        self.vectors = vectors
+        self.scales = scales
+        self.block_rows = block_rows
+        self.dim = vectors.shape[1] if vectors.ndim == 2 else 0
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        scales = None
+        if meta["dtype"] == "int8":
+            scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+        return cls(ids, vectors, scales, **kwargs)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, art_id):
+        return self._row(art_id) is not None
+
+    def _row(self, art_id):
+        pos = int(np.searchsorted(self.ids, art_id))
+        if pos < len(self.ids) and self.ids[pos] == art_id:
+            return pos
+        return None
+
+    def _block(self, start, stop):
+        block = np.asarray(self.vectors[start:stop], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[start:stop, None]
+        return block
+
+    def vector(self, art_id):
+        row = self._row(art_id)
+        if row is None:
+            return None
+        return self._block(row, row + 1)[0]
+
+    def search(self, queries, k=5, exclude_ids=None):
+        """
+        Top-k cosine untuk satu atau banyak query sekaligus.
+        Return list (per query) berisi pasangan (id, score), score memakai skala
+        yang sama dengan vector index Neo4j: (1 + cosine) / 2.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        n_queries = queries.shape[0]
+        # Ambil k+1 biar masih cukup setelah membuang id yang di-exclude
+        want = min(k + (1 if exclude_ids is not None else 0), len(self.ids))
+        best_scores = np.full((n_queries, 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((n_queries, 0), dtype=np.int64)
+
+        for start in range(0, len(self.ids), self.block_rows):
+            stop = min(start + self.block_rows, len(self.ids))
+            scores = queries @ self._block(start, stop).T
+
+            take = min(want, stop - start)
+            part = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            cand_scores = np.take_along_axis(scores, part, axis=1)
+
+            best_scores = np.concatenate([best_scores, cand_scores], axis=1)
+            best_rows = np.concatenate([best_rows, part + start], axis=1)
+            if best_scores.shape[1] > want:
+                keep = np.argpartition(-best_scores, want - 1, axis=1)[:, :want]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+
+        results = []
+        for qi in range(n_queries):
+            excluded = exclude_ids[qi] if exclude_ids is not None else None
+            hits = []
+            for row, score in zip(best_rows[qi], best_scores[qi]):
+                art_id = int(self.ids[row])
+                if art_id == excluded:
+                    continue
+                hits.append((art_id, float((1 + score) / 2)))
+                if len(hits) == k:
+                    break
+            results.append(hits)
+        return results
+
+    def neighbours(self, art_id, k=5):
+        vec = self.vector(art_id)
+        if vec is None:
+            return []
+        return self.search(vec, k=k, exclude_ids=[art_id])[0]
+
+
+def export_embeddings(driver, out_dir, dtype="float32", batch_size=5000):
+    """Tarik semua embedding Artwork dari Neo4j ke file .npy (sync driver)."""
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype harus salah satu dari {DTYPES}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    with driver.session() as session:
+        total = session.run(
+            "MATCH (a:Artwork) WHERE a.embedding IS NOT NULL RETURN count(a) AS n"
+        ).single()["n"]
+        first = session.run(
+            "MATCH (a:Artwork) WHERE a.embedding IS NOT NULL RETURN size(a.embedding) AS dim LIMIT 1"
+        ).single()
+        dim = first["dim"] if first else 384
+
+        ids = np.lib.format.open_memmap(os.path.join(out_dir, "ids.npy"), mode="w+", dtype=np.int64, shape=(total,))
+        vectors = np.lib.format.open_memmap(os.path.join(out_dir, "vectors.npy"), mode="w+", dtype=np.dtype(dtype), shape=(total, dim))
+        scales = None
+        if dtype == "int8":
+            scales = np.lib.format.open_memmap(os.path.join(out_dir, "scales.npy"), mode="w+", dtype=np.float32, shape=(total,))
+
+        # Keyset pagination by id, hasil otomatis urut naik (dipakai searchsorted)
+        row = 0
+        last_id = None
+        while row < total:
+            records = session.run("""
+                MATCH (a:Artwork)
+                WHERE a.embedding IS NOT NULL AND ($last_id IS NULL OR a.id > $last_id)
+                RETURN a.id AS id, a.embedding AS embedding
+                ORDER BY a.id
+                LIMIT $limit
+            """, last_id=last_id, limit=batch_size).data()
+            if not records:
+                break
+            records = records[: total - row]
+
+            block = np.asarray([r["embedding"] for r in records], dtype=np.float32)
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            block /= np.where(norms == 0, 1, norms)
+
+            end = row + len(records)
+            ids[row:end] = [r["id"] for r in records]
+            if dtype == "int8":
+                row_scale = np.abs(block).max(axis=1) / 127.0
+                row_scale[row_scale == 0] = 1.0
+                vectors[row:end] = np.round(block / row_scale[:, None]).astype(np.int8)
+                scales[row:end] = row_scale
+            else:
+                vectors[row:end] = block.astype(dtype)
+
+            row = end
+            last_id = records[-1]["id"]
+            print(f"   ⏳ Export embedding: {row}/{total}", end="\r")
+
+    for arr in (ids, vectors, scales):
+        if arr is not None:
+            arr.flush()
+
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"dtype": dtype, "dim": dim, "count": row}, f)
+    print(f"\n✅ Export {row} embedding ({dtype}) ke {out_dir}")
+    return row
+
+
+# Index yang dipakai API, di-load sekali per worker saat startup (lifespan)
+_index = None
+
+
+def load_default():
+    global _index
+    path = os.getenv("EMBEDDING_INDEX_PATH")
+    if path and os.path.exists(os.path.join(path, "meta.json")):
+        _index = EmbeddingIndex.load(path)
+        print(f"Embedding index loaded: {len(_index)} vectors dari {path}")
+    return _index
+
+
+def get_index():
+    return _index
+
+
+if __name__ == "__main__":
+    from neo4j import GraphDatabase
+    from app.db import uri, username, password
+
+    parser = argparse.ArgumentParser(description="Export embedding Artwork ke index memory-mapped")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export")
+    export.add_argument("--out", required=True)
+    export.add_argument("--dtype", choices=DTYPES, default="float32")
+    export.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    sync_driver = GraphDatabase.driver(uri, auth=(username, password))
+    try:
+        export_embeddings(sync_driver, args.out, dtype=args.dtype, batch_size=args.batch_size)
+    finally:
+        sync_driver.close()
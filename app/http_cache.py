@@ -0,0 +1,76 @@
+"""
+ETag + conditional GET untuk endpoint read.
+
+ETag dibentuk dari data version graph (lihat app/cache.py) + nama route +
+parameter request, jadi kalau ETL / worker Wikidata belum jalan lagi,
+`If-None-Match` langsung dibalas 304 tanpa query ke Neo4j sama sekali.
+
+Cache-Control bisa diatur per route lewat env, contoh:
+    CACHE_CONTROL_ARTWORK="public, max-age=3600, stale-while-revalidate=86400"
+"""
+import hashlib
+import os
+from fastapi import Depends, HTTPException, Request, Response
+from app.cache import data_version
+
+DEFAULT_CACHE_CONTROL = {
+    "artwork": "public, max-age=300",
+    "artist": "public, max-age=300",
+    "location": "public, max-age=300",
+    "movement": "public, max-age=300",
+    "year": "public, max-age=300",
+    "search": "public, max-age=60",
+    "suggest": "public, max-age=60",
+    "graph": "public, max-age=300",
+}
+
+
+def cache_control(name):
+    return os.getenv(f"CACHE_CONTROL_{name.upper()}", DEFAULT_CACHE_CONTROL.get(name, "no-cache"))
+
+
+def make_etag(version, name, request):
+    params = tuple(sorted(request.path_params.items())) + tuple(sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(repr(params).encode("utf-8")).hexdigest()[:16]
+    return f'"v{version}-{name}-{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match pakai weak comparison, jadi prefix W/ diabaikan
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+def uncacheable(response):
+    """Response degraded (DB error, index belum siap): jangan kasih ETag / disimpan cache."""
+    if "etag" in response.headers:
+        del response.headers["etag"]
+    response.headers["Cache-Control"] = "no-store"
+
+
+def conditional_get(name, version_of=None):
+    """
+    Dependency route: pasang ETag & Cache-Control, balas 304 kalau cocok.
+
+    `version_of` (opsional) = versi konten yang benar-benar dilayani route,
+    misal index /suggest yang di-rebuild di background dan bisa tertinggal
+    dari data version. None = belum ada konten yang boleh di-cache.
+    """
+
+    async def dependency(request: Request, response: Response):
+        # Tetap poll data version: perubahan memicu rebuild index di background
+        version = await data_version.get()
+        if version_of is not None:
+            version = version_of()
+            if version is None:
+                uncacheable(response)
+                return
+        etag = make_etag(version, name, request)
+        headers = {"ETag": etag, "Cache-Control": cache_control(name)}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(dependency)
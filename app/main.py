@@ -1,15 +1,58 @@
-from fastapi import FastAPI, HTTPException
-from app.models import QueryRequest, SearchResponse, ArtistDetail, ArtworkPageResponse
-# Import driver juga dari services untuk dipakai session-nya
-from app.services import run_custom_query, search_graph, get_artwork_by_id, get_artist_by_name, driver 
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+import time
+from fastapi import FastAPI, HTTPException, Query, Response
+from app.models import (
+    QueryRequest, SearchResponse, ArtistDetail, ArtworkPageResponse,
+    ArtworkBatchRequest, ArtistBatchRequest, ArtworkBatchResponse, ArtistBatchResponse,
+    GraphExpandResponse
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
+from starlette.datastructures import Headers, QueryParams
+from app import db, embedding_index, metrics, profiling, semantic
+from app.cache import cached_read, cached_call, entity_cache, search_cache, inflight, data_version, normalize_query
+from app.suggest import suggest_service
+from app.snapshot import snapshot_service
+from app.http_cache import conditional_get, uncacheable
 from app.services import (
-    run_custom_query, search_graph, get_artwork_by_id, get_artist_by_name, 
-    get_location_details, get_movement_details, driver,
-    get_year_details, driver
+    run_custom_query, stream_custom_query, RUN_QUERY_MAX_ROWS, search_graph, get_artwork_by_id, get_artist_by_name,
+    get_location_details, get_movement_details,
+    get_year_details, get_artworks_batch, get_artists_batch, expand_graph, EXPAND_MAX_NODES, InvalidNodeRef
 )
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Satu AsyncDriver per worker, dibuka saat startup & ditutup saat shutdown
+    await db.init_driver()
+    try:
+        await db.warmup()
+    except Exception as e:
+        # DB belum bisa dihubungi: tetap start, request pertama yang akan retry
+        print(f"Neo4j warmup gagal: {e}")
+    # Opsional: index embedding memory-mapped (env EMBEDDING_INDEX_PATH)
+    embedding_index.load_default()
+    if os.getenv("SEMANTIC_WARMUP") == "1":
+        # Load model MiniLM sekarang, bukan saat query hybrid pertama
+        try:
+            await asyncio.to_thread(semantic.embed_query, "warmup")
+        except Exception as e:
+            print(f"Semantic warmup gagal: {e}")
+    # Index typeahead dibangun di background, startup tidak ikut nunggu
+    version = await data_version.get()
+    suggest_service.schedule_rebuild(version)
+    if snapshot_service.enabled:
+        # GRAPH_SNAPSHOT=1: request pertama sudah dijawab dari memori
+        await snapshot_service.wait_ready(version)
+    try:
+        yield
+    finally:
+        await db.close_driver()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,60 +62,246 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class RequestMiddleware:
+    """
+    Middleware ASGI biasa (bukan BaseHTTPMiddleware, yang menambah task &
+    stream per request): catat latency per route, dan untuk ?profile=1 +
+    header X-Admin-Token jalankan query endpoint di bawah PROFILE lalu
+    tempel plan-nya di samping response biasa.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            if wants_profile(scope):
+                await self.profile(scope, receive, send_with_status)
+            else:
+                await self.app(scope, receive, send_with_status)
+        finally:
+            # Pakai template route ("/artwork/{art_id}") biar label tidak meledak per id
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            metrics.REQUEST_LATENCY.observe(scope["method"], path, str(status), value=time.perf_counter() - start)
+
+    async def profile(self, scope, receive, send):
+        headers = Headers(scope=scope)
+        if not profiling.is_authorized(headers.get("x-admin-token")):
+            response = JSONResponse({"detail": "Profiling requires a valid X-Admin-Token"}, status_code=403)
+            await response(scope, receive, send)
+            return
+
+        plans = profiling.start()
+        messages = []
+
+        async def capture(message):
+            messages.append(message)
+
+        await self.app(scope, receive, capture)
+        start_message = messages[0]
+        content_type = Headers(raw=start_message.get("headers", [])).get("content-type", "")
+        if not content_type.startswith("application/json"):
+            for message in messages:
+                await send(message)
+            return
+        body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+        response = JSONResponse({"data": json.loads(body), "profile": plans}, status_code=start_message["status"])
+        await response(scope, receive, send)
+
+
+def wants_profile(scope):
+    return QueryParams(scope.get("query_string", b"")).get("profile") in ("1", "true")
+
+
+app.add_middleware(RequestMiddleware)
+
+async def read_entity(name, work, *args):
+    # Sama seperti cached_read, tapi lewat snapshot in-memory kalau aktif (app/snapshot.py)
+    return await cached_call(name, lambda *a: snapshot_service.read(work, *a), *args)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    cache_gauge = metrics.Gauge("app_cache_events", "Statistik cache in-process.", ("cache", "event"))
+    for cache_name, cache in (("entity", entity_cache), ("search", search_cache)):
+        for event in ("hits", "misses", "evictions", "size"):
+            cache_gauge.set(cache_name, event, value=cache.stats()[event])
+    cache_gauge.set("single_flight", "coalesced", value=inflight.coalesced)
+    return PlainTextResponse(
+        metrics.render(extra=[cache_gauge]),
+        media_type="text/plain; version=0.0.4",
+    )
+
 @app.post("/run-query")
 async def run_query(request: QueryRequest):
+    if request.stream:
+        return await stream_query(request)
     try:
-        result = run_custom_query(request.query)
-        return {"result": result}
+        result = await run_custom_query(request.query, request.limit)
+        if "error" in result:
+            return {"result": result}
+        return {"result": result["rows"], "truncated": result["truncated"]}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error: {e}")
-    
-@app.get("/search", response_model=SearchResponse)
-async def search(q: str):
+
+async def stream_query(request: QueryRequest):
+    # Mode NDJSON: satu record per baris, dikirim begitu datang dari Neo4j.
+    # Baris terakhir berisi {"_meta": {...}} (jumlah baris & kepotong/tidak)
+    limit = min(request.limit or RUN_QUERY_MAX_ROWS, RUN_QUERY_MAX_ROWS)
+    rows = stream_custom_query(request.query, limit + 1)
+
+    # Ambil record pertama dulu supaya query yang ditolak / error
+    # masih bisa dibalas 400 sebelum header 200 terkirim
+    try:
+        first = await rows.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error: {e}")
+
+    async def body():
+        count = 0
+        truncated = False
+        try:
+            if first is not None:
+                yield json.dumps(first, default=str) + "\n"
+                count = 1
+                async for row in rows:
+                    # Generator minta limit+1 baris; baris ekstra cuma penanda kepotong
+                    if count >= limit:
+                        truncated = True
+                        break
+                    yield json.dumps(row, default=str) + "\n"
+                    count += 1
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            await rows.aclose()
+        yield json.dumps({"_meta": {"rows": count, "truncated": truncated}}) + "\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.get("/search", response_model=SearchResponse, dependencies=[conditional_get("search")])
+async def search(response: Response, q: str, mode: Literal["fulltext", "hybrid"] = "fulltext"):
+    q = normalize_query(q)
     if not q:
         raise HTTPException(status_code=400, detail="Query empty")
-    results = search_graph(q)
+    try:
+        # Satu query per query unik (cache + coalescing request paralel)
+        if mode == "hybrid":
+            results = await cached_call("search_hybrid", semantic.hybrid_search, q, cache=search_cache)
+        else:
+            results = await cached_read("search", search_graph, q, cache=search_cache)
+    except semantic.SemanticUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Hybrid search unavailable: {e}")
+    except semantic.PartialResults as e:
+        # Satu leg retrieval gagal: tetap balas, tapi jangan di-cache
+        results = e.results
+        uncacheable(response)
+    except Exception as e:
+        print(f"Search Error: {e}")
+        results = []
+        # Hasil kosong karena error jangan sampai di-cache client/CDN
+        uncacheable(response)
     return {"results": results}
 
-@app.get("/artwork/{art_id}", response_model=ArtworkPageResponse)
-def read_artwork(art_id: int):
-    with driver.session() as session:
-        result = session.execute_read(get_artwork_by_id, art_id)
-        if not result:
-            raise HTTPException(status_code=404, detail="Artwork not found")
-        return result
+# ETag pakai versi index yang sedang dilayani, bukan data version: index
+# di-rebuild di background (dipicu poll data version) dan di-swap begitu selesai
+@app.get("/suggest", response_model=SearchResponse,
+         dependencies=[conditional_get("suggest", version_of=lambda: suggest_service.version)])
+async def suggest(q: str, limit: int = Query(10, ge=1, le=25)):
+    return {"results": suggest_service.suggest(q, limit)}
 
-@app.get("/artist/{artist_name}", response_model=ArtistDetail)
-def read_artist(artist_name: str):
+@app.get("/artwork/{art_id}", response_model=ArtworkPageResponse, dependencies=[conditional_get("artwork")])
+async def read_artwork(art_id: int):
+    result = await read_entity("artwork", get_artwork_by_id, art_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Artwork not found")
+    return result
+
+@app.get("/artist/{artist_name}", response_model=ArtistDetail, dependencies=[conditional_get("artist")])
+async def read_artist(
+    artist_name: str,
+    limit: int = Query(24, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "year"] = "id",
+):
     # Decode URL component otomatis dilakukan FastAPI, tapi kita strip() di service
-    with driver.session() as session:
-        result = session.execute_read(get_artist_by_name, artist_name)
-        if not result:
-            raise HTTPException(status_code=404, detail="Artist not found")
-        return result
-    
-@app.get("/location/{name}")
-def read_location(name: str):
-    with driver.session() as session:
-        result = session.execute_read(get_location_details, name)
-        if not result:
-            raise HTTPException(status_code=404, detail="Location not found")
-        return result
-
-@app.get("/movement/{name}")
-def read_movement(name: str):
-    with driver.session() as session:
-        result = session.execute_read(get_movement_details, name)
-        if not result:
-            raise HTTPException(status_code=404, detail="Movement not found")
-        return result
-    
-@app.get("/year/{year}")
-def read_year(year: int):
-    with driver.session() as session:
-        result = session.execute_read(get_year_details, year)
-        if not result:
-            # Tahun mungkin belum ada di DB, tapi gak error, return kosong aja
-            return {"year": year, "born_list": [], "died_list": [], "artworks": []}
-        return result
-    
\ No newline at end of file
+    try:
+        result = await read_entity("artist", get_artist_by_name, artist_name.strip(), limit, cursor, sort)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not result:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    return result
+
+@app.post("/artworks/batch", response_model=ArtworkBatchResponse)
+async def read_artworks_batch(request: ArtworkBatchRequest):
+    # Satu round trip untuk banyak kartu artwork, yang tidak ada ditandai found=false
+    return {"results": await snapshot_service.read(get_artworks_batch, request.ids)}
+
+@app.post("/artists/batch", response_model=ArtistBatchResponse)
+async def read_artists_batch(request: ArtistBatchRequest):
+    return {"results": await snapshot_service.read(get_artists_batch, request.names)}
+
+@app.get("/location/{name}", dependencies=[conditional_get("location")])
+async def read_location(name: str):
+    result = await read_entity("location", get_location_details, name)
+    if not result:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return result
+
+@app.get("/movement/{name}", dependencies=[conditional_get("movement")])
+async def read_movement(name: str):
+    result = await read_entity("movement", get_movement_details, name)
+    if not result:
+        raise HTTPException(status_code=404, detail="Movement not found")
+    return result
+
+@app.get("/year/{year}", dependencies=[conditional_get("year")])
+async def read_year(year: int):
+    result = await read_entity("year", get_year_details, year)
+    if not result:
+        # Tahun mungkin belum ada di DB, tapi gak error, return kosong aja
+        return {"year": year, "born_list": [], "died_list": [], "artworks": []}
+    return result
+
+@app.get("/graph/expand", response_model=GraphExpandResponse, dependencies=[conditional_get("graph")])
+async def read_graph_expand(
+    node: str,
+    depth: int = Query(1, ge=1, le=3),
+    limit: int = Query(100, ge=1, le=EXPAND_MAX_NODES),
+):
+    # node = "Artist:Claude Monet", "Artwork:42", "Year:1889", "Period:...", "Location:..."
+    try:
+        result = await read_entity("graph_expand", expand_graph, node, depth, limit)
+    except InvalidNodeRef as e:
+        # Cuma pesan dari parse_node_ref; ValueError lain bukan salah input client
+        raise HTTPException(status_code=400, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return result
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "data_version": data_version.value,
+        "entity_cache": entity_cache.stats(),
+        "search_cache": search_cache.stats(),
+        "single_flight": inflight.stats(),
+        "suggest_index": suggest_service.stats(),
+        "graph_snapshot": snapshot_service.stats(),
+    }
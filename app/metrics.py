@@ -0,0 +1,216 @@
+"""
+Metrics gaya Prometheus (text exposition format) tanpa dependency tambahan.
+
+- http_request_duration_seconds{method,route,status}   -> dari middleware di app/main.py
+- neo4j_query_duration_seconds{query}                  -> dari InstrumentedTx (app/db.py)
+- neo4j_query_records_total / neo4j_query_server_time_seconds_total / ...
+
+Semua update cuma operasi dict + bisect di event loop, cukup murah untuk
+dibiarkan nyala di production.
+"""
+import time
+from bisect import bisect_left
+from app import profiling
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *label_values, value):
+        self.values[label_values] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label_values -> [counts per bucket (+Inf terakhir), sum, count]
+        self.values = {}
+
+    def observe(self, *label_values, value):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels + ("le",), label_values + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latency request HTTP per route.", ("method", "route", "status")
+)
+QUERY_LATENCY = Histogram(
+    "neo4j_query_duration_seconds", "Latency query Cypher (client side, sampai result habis dibaca).", ("query",)
+)
+QUERY_SERVER_TIME = Counter(
+    "neo4j_query_server_time_seconds_total",
+    "Total result_available_after + result_consumed_after dari ResultSummary.", ("query",)
+)
+QUERY_RECORDS = Counter("neo4j_query_records_total", "Jumlah record yang dikembalikan.", ("query",))
+QUERY_ERRORS = Counter("neo4j_query_errors_total", "Query Cypher yang gagal.", ("query",))
+QUERY_DB_UPDATES = Counter(
+    "neo4j_query_updates_total", "Counter update dari ResultSummary (nodes/relationships/properties).", ("query", "kind")
+)
+QUERY_NOTIFICATIONS = Counter(
+    "neo4j_query_notifications_total", "Notifikasi planner (misal cartesian product).", ("query", "code")
+)
+
+REGISTRY = [
+    REQUEST_LATENCY, QUERY_LATENCY, QUERY_SERVER_TIME, QUERY_RECORDS,
+    QUERY_ERRORS, QUERY_DB_UPDATES, QUERY_NOTIFICATIONS,
+]
+
+UPDATE_KINDS = (
+    "nodes_created", "nodes_deleted", "relationships_created",
+    "relationships_deleted", "properties_set",
+)
+
+
+def observe_query(name, elapsed, records, summary):
+    QUERY_LATENCY.observe(name, value=elapsed)
+    QUERY_RECORDS.inc(name, amount=records)
+    if summary is None:
+        return
+    server_ms = (summary.result_available_after or 0) + (summary.result_consumed_after or 0)
+    QUERY_SERVER_TIME.inc(name, amount=server_ms / 1000)
+    counters = summary.counters
+    if counters is not None and counters.contains_updates:
+        for kind in UPDATE_KINDS:
+            value = getattr(counters, kind, 0)
+            if value:
+                QUERY_DB_UPDATES.inc(name, kind, amount=value)
+    for notification in getattr(summary, "notifications", None) or []:
+        QUERY_NOTIFICATIONS.inc(name, notification.get("code", "unknown"))
+
+
+def render(extra=()):
+    lines = []
+    for metric in list(REGISTRY) + list(extra):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class InstrumentedResult:
+    """Bungkus AsyncResult: catat durasi & ResultSummary begitu result habis dibaca."""
+
+    def __init__(self, result, name, started):
+        self._result = result
+        self._name = name
+        self._started = started
+        self._records = 0
+        self._done = False
+
+    def __getattr__(self, attr):
+        return getattr(self._result, attr)
+
+    async def _finish(self):
+        if self._done:
+            return None
+        self._done = True
+        summary = await self._result.consume()
+        observe_query(self._name, time.perf_counter() - self._started, self._records, summary)
+        profiling.record(self._name, summary)
+        return summary
+
+    async def single(self, strict=False):
+        record = await self._result.single(strict=strict)
+        self._records += 1 if record is not None else 0
+        await self._finish()
+        return record
+
+    async def data(self, *keys):
+        rows = await self._result.data(*keys)
+        self._records += len(rows)
+        await self._finish()
+        return rows
+
+    def abandon(self):
+        """
+        Result ditinggal sebelum habis (row cap, client putus): catat durasi &
+        jumlah record yang sudah dibaca tanpa consume(), yang akan membuat
+        server menjalankan sisa query sampai selesai.
+        """
+        if self._done:
+            return
+        self._done = True
+        observe_query(self._name, time.perf_counter() - self._started, self._records, None)
+
+    async def consume(self):
+        summary = await self._finish()
+        return summary if summary is not None else await self._result.consume()
+
+    async def __aiter__(self):
+        async for record in self._result:
+            self._records += 1
+            yield record
+        await self._finish()
+
+
+class InstrumentedTx:
+    """Proxy transaction: setiap tx.run() diukur per nama service function."""
+
+    def __init__(self, tx, name):
+        self._tx = tx
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._tx, attr)
+
+    async def run(self, query, parameters=None, **kwargs):
+        if profiling.active() and not query.lstrip().upper().startswith(("EXPLAIN", "PROFILE")):
+            query = f"PROFILE {query}"
+        started = time.perf_counter()
+        try:
+            result = await self._tx.run(query, parameters, **kwargs)
+        except Exception:
+            QUERY_ERRORS.inc(self._name)
+            raise
+        return InstrumentedResult(result, self._name, started)
@@ -1,8 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Any, Union
 
 class QueryRequest(BaseModel):
     query: str
+    limit: Optional[int] = Field(None, ge=1)  # dibatasi lagi oleh RUN_QUERY_MAX_ROWS
+    stream: bool = False                       # True = response NDJSON (streaming)
 
 class SearchResult(BaseModel):
     id: Union[str, int]
@@ -38,8 +40,73 @@ class ArtistDetail(BaseModel):
     base: Optional[str] = None 
     type: str = "Artist"
     artworks: List[ArtworkDetail] = [] 
+    total_artworks: int = 0
+    next_cursor: Optional[str] = None
 
 class ArtworkPageResponse(BaseModel):
     artwork: ArtworkDetail
     artist: Optional[ArtistDetail] = None
-    similar: List[dict] = []
\ No newline at end of file
+    similar: List[dict] = []
+
+# --- Batch fetch (kartu ringan untuk galeri / koleksi) ---
+MAX_BATCH_SIZE = 100
+
+class ArtworkBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class ArtistBatchRequest(BaseModel):
+    names: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class ArtworkCard(BaseModel):
+    id: int
+    title: Optional[str] = None
+    url: Optional[str] = None
+    year: Optional[str] = None
+    medium: Optional[str] = None
+    artist_name: Optional[str] = None
+    type: str = "Artwork"
+
+class ArtistCard(BaseModel):
+    id: str
+    name: str
+    nationality: Optional[str] = None
+    image: Optional[str] = None
+    birth_year: Optional[int] = None
+    death_year: Optional[int] = None
+    period: Optional[str] = None
+    artworks_count: int = 0
+    type: str = "Artist"
+
+class ArtworkBatchItem(BaseModel):
+    id: int                               # id yang diminta (urutan sama dengan input)
+    found: bool
+    item: Optional[ArtworkCard] = None
+
+class ArtistBatchItem(BaseModel):
+    id: str
+    found: bool
+    item: Optional[ArtistCard] = None
+
+class ArtworkBatchResponse(BaseModel):
+    results: List[ArtworkBatchItem]
+
+class ArtistBatchResponse(BaseModel):
+    results: List[ArtistBatchItem]
+
+# --- /graph/expand (payload ringkas untuk visualisasi) ---
+
+class GraphNode(BaseModel):
+    id: str                               # "<Label>:<key>", bisa dipakai lagi sebagai ?node=
+    type: str
+    label: Optional[str] = None
+    degree: int = 0                       # total relasi; > edge yang tampil = masih bisa di-expand
+
+class GraphEdge(BaseModel):
+    source: str
+    target: str
+    type: str
+
+class GraphExpandResponse(BaseModel):
+    nodes: List[GraphNode]
+    edges: List[GraphEdge]
+    truncated: bool = False               # True kalau budget node / edge habis
@@ -0,0 +1,177 @@
+"""
+Mode profiling opt-in: jalankan query endpoint di bawah PROFILE dan
+kembalikan db hits, rows & waktu per operator di samping response biasa.
+
+Per request (butuh env ADMIN_TOKEN):
+    GET /artist/Claude%20Monet?profile=1   + header X-Admin-Token: <token>
+    -> {"data": <response biasa>, "profile": [...]}
+
+Baseline plan semua endpoint (buat deteksi regresi, misal index
+Artist.original_name / Year.value hilang):
+    python -m app.profiling dump --out profile_baseline.json
+    python -m app.profiling diff profile_baseline.json profile_new.json
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+from contextvars import ContextVar
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# List tempat InstrumentedTx menaruh hasil PROFILE; None = profiling mati
+_collector = ContextVar("profile_collector", default=None)
+
+
+def start():
+    plans = []
+    _collector.set(plans)
+    return plans
+
+
+def active():
+    return _collector.get() is not None
+
+
+def is_authorized(token):
+    if not ADMIN_TOKEN or not token:
+        return False
+    # Bandingkan constant-time, biar token tidak bisa ditebak lewat timing
+    return hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+
+def _stat(plan, key, arg_key):
+    value = plan.get(key)
+    if value is None:
+        value = plan.get("args", {}).get(arg_key)
+    return value or 0
+
+
+def flatten_plan(plan, depth=0):
+    if not plan:
+        return []
+    args = plan.get("args", {})
+    row = {
+        "operator": plan.get("operatorType"),
+        "depth": depth,
+        "db_hits": _stat(plan, "dbHits", "DbHits"),
+        "rows": _stat(plan, "rows", "Rows"),
+        "time_ms": round((args.get("Time") or 0) / 1_000_000, 3),  # Time dari Neo4j dalam nanodetik
+        "details": args.get("Details"),
+    }
+    rows = [row]
+    for child in plan.get("children", []):
+        rows.extend(flatten_plan(child, depth + 1))
+    return rows
+
+
+def record(name, summary):
+    plans = _collector.get()
+    if plans is None or summary is None or not summary.profile:
+        return
+    operators = flatten_plan(summary.profile)
+    plans.append({
+        "query": name,
+        "db_hits": sum(op["db_hits"] for op in operators),
+        "rows": operators[0]["rows"] if operators else 0,
+        "server_ms": (summary.result_available_after or 0) + (summary.result_consumed_after or 0),
+        "operators": operators,
+    })
+
+
+# --- Baseline dump / diff ---
+
+SAMPLE_PARAMS_QUERY = """
+CALL { MATCH (w:Artwork) RETURN w.id AS art_id ORDER BY w.id LIMIT 1 }
+CALL { MATCH (a:Artist) RETURN a.original_name AS artist ORDER BY COUNT { (:Artwork)-[:CREATED_BY]->(a) } DESC LIMIT 1 }
+CALL { MATCH (l:Location) RETURN l.name AS location LIMIT 1 }
+CALL { MATCH (p:Period) RETURN p.name AS movement LIMIT 1 }
+CALL { MATCH (y:Year) RETURN y.value AS year LIMIT 1 }
+RETURN art_id, artist, location, movement, year
+"""
+
+
+async def dump_baseline(search_term="monet"):
+    from app import db
+    from app import services
+
+    await db.init_driver()
+    try:
+        async def fetch_samples(tx):
+            cursor = await tx.run(SAMPLE_PARAMS_QUERY)
+            record_ = await cursor.single()
+            return record_.data() if record_ else {}
+
+        samples = await db.read(fetch_samples)
+        endpoints = {
+            "/search": (services.search_graph, search_term),
+            "/artwork/{art_id}": (services.get_artwork_by_id, samples.get("art_id")),
+            "/artist/{artist_name}": (services.get_artist_by_name, samples.get("artist")),
+            "/location/{name}": (services.get_location_details, samples.get("location")),
+            "/movement/{name}": (services.get_movement_details, samples.get("movement")),
+            "/year/{year}": (services.get_year_details, samples.get("year")),
+            "/graph/expand": (services.expand_graph, samples.get("artist") and f"Artist:{samples['artist']}"),
+        }
+
+        baseline = {"samples": samples, "endpoints": {}}
+        for route, (work, arg) in endpoints.items():
+            if arg is None:
+                continue
+            plans = start()
+            await db.read(work, arg)
+            baseline["endpoints"][route] = plans
+            _collector.set(None)
+        return baseline
+    finally:
+        await db.close_driver()
+
+
+def diff_baselines(old, new, threshold=0.2):
+    """Bandingkan dua baseline: operator yang berubah & db hits yang naik > threshold."""
+    report = []
+    for route, new_plans in new.get("endpoints", {}).items():
+        old_plans = {p["query"]: p for p in old.get("endpoints", {}).get(route, [])}
+        for plan in new_plans:
+            before = old_plans.get(plan["query"])
+            if before is None:
+                report.append(f"{route} [{plan['query']}]: query baru, {plan['db_hits']} db hits")
+                continue
+            old_ops = sorted({op["operator"] for op in before["operators"]})
+            new_ops = sorted({op["operator"] for op in plan["operators"]})
+            if old_ops != new_ops:
+                removed = sorted(set(old_ops) - set(new_ops))
+                added = sorted(set(new_ops) - set(old_ops))
+                report.append(f"{route} [{plan['query']}]: plan berubah, hilang {removed}, baru {added}")
+            if before["db_hits"] and (plan["db_hits"] - before["db_hits"]) / before["db_hits"] > threshold:
+                report.append(
+                    f"{route} [{plan['query']}]: db hits {before['db_hits']} -> {plan['db_hits']}"
+                )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dump / diff PROFILE plan semua endpoint")
+    sub = parser.add_subparsers(dest="command", required=True)
+    dump = sub.add_parser("dump")
+    dump.add_argument("--out", required=True)
+    dump.add_argument("--search-term", default="monet")
+    diff = sub.add_parser("diff")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.command == "dump":
+        result = asyncio.run(dump_baseline(args.search_term))
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"✅ Baseline {len(result['endpoints'])} endpoint disimpan ke {args.out}")
+    else:
+        with open(args.old, encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        changes = diff_baselines(old, new, args.threshold)
+        print("\n".join(changes) if changes else "Tidak ada perubahan plan.")
+        raise SystemExit(1 if changes else 0)
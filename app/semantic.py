@@ -0,0 +1,141 @@
+"""
+Hybrid search: fulltext (Lucene `search_art`) + semantic (embedding MiniLM)
+digabung pakai Reciprocal Rank Fusion.
+
+- Model di-load sekali per worker (lazy, saat query hybrid pertama / warmup).
+- Embedding query di-cache LRU, jadi query populer cuma di-encode sekali.
+- Retrieval vector & fulltext jalan bersamaan (asyncio.gather), jadi
+  latency ~ max(keduanya), bukan jumlahnya.
+"""
+import asyncio
+import os
+import threading
+from functools import lru_cache
+from app import db, embedding_index
+from app.services import search_graph
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")  # harus sama dengan ETL
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "4096"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+VECTOR_TOP_K = 50
+
+_model = None
+_model_lock = threading.Lock()
+
+
+class SemanticUnavailable(Exception):
+    """Model embedding tidak bisa di-load (misal sentence-transformers tidak ter-install)."""
+
+
+class PartialResults(Exception):
+    """
+    Retrieval semantic gagal sementara, hasil cuma dari fulltext. Dilempar
+    sebagai exception supaya cached_call tidak menyimpannya di cache.
+    """
+
+    def __init__(self, results, cause):
+        super().__init__(str(cause))
+        self.results = results
+
+
+def get_model():
+    global _model
+    if _model is None:
+        # Dipanggil dari beberapa to_thread sekaligus: model cukup di-load sekali
+        with _model_lock:
+            if _model is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(EMBEDDING_MODEL)
+                except Exception as e:
+                    raise SemanticUnavailable(f"Model {EMBEDDING_MODEL} tidak bisa di-load: {e}") from e
+    return _model
+
+
+@lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+def embed_query(text):
+    return tuple(float(x) for x in get_model().encode(text))
+
+
+VECTOR_SEARCH_QUERY = """
+CALL db.index.vector.queryNodes('art_embeddings_index', $k, $embedding)
+YIELD node, score
+OPTIONAL MATCH (node)-[:CREATED_BY]->(a:Artist)
+RETURN node.id AS id, node.title AS title, node.image_url AS url,
+       node.year_created AS year, node.medium AS medium,
+       a.original_name AS artist, score
+ORDER BY score DESC
+"""
+
+# Dipakai kalau index in-process (app/embedding_index.py) tersedia:
+# tetangga dihitung lokal, Neo4j cuma dipakai untuk ambil detail kartu
+ARTWORKS_BY_IDS_QUERY = """
+UNWIND $hits AS hit
+MATCH (node:Artwork {id: hit.id})
+OPTIONAL MATCH (node)-[:CREATED_BY]->(a:Artist)
+RETURN node.id AS id, node.title AS title, node.image_url AS url,
+       node.year_created AS year, node.medium AS medium,
+       a.original_name AS artist, hit.score AS score
+ORDER BY score DESC
+"""
+
+
+async def vector_search(tx, embedding, k=VECTOR_TOP_K):
+    index = embedding_index.get_index()
+    if index is not None:
+        hits = [{"id": i, "score": s} for i, s in index.search(list(embedding), k=k)[0]]
+        cursor = await tx.run(ARTWORKS_BY_IDS_QUERY, hits=hits)
+    else:
+        cursor = await tx.run(VECTOR_SEARCH_QUERY, k=k, embedding=list(embedding))
+    return [
+        {
+            "id": r["id"],
+            "type": "Artwork",
+            "label": r["title"],
+            "score": r["score"],
+            "details": {
+                "url": r["url"],
+                "title": r["title"],
+                "artist_name_raw": r["artist"],
+                "year": r["year"],
+                "medium": r["medium"],
+            },
+        }
+        async for r in cursor
+    ]
+
+
+def reciprocal_rank_fusion(result_lists, k=RRF_K, limit=50):
+    fused = {}
+    for results in result_lists:
+        for rank, item in enumerate(results):
+            key = (item["type"], item["id"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = dict(item, score=0.0)
+            entry["score"] += 1.0 / (k + rank + 1)
+    return sorted(fused.values(), key=lambda item: item["score"], reverse=True)[:limit]
+
+
+async def _semantic(q):
+    embedding = await asyncio.to_thread(embed_query, q)
+    return await db.read(vector_search, embedding)
+
+
+async def hybrid_search(q):
+    fulltext, semantic = await asyncio.gather(
+        db.read(search_graph, q), _semantic(q), return_exceptions=True
+    )
+    if isinstance(semantic, SemanticUnavailable):
+        # Tanpa model, hasil "hybrid" cuma fulltext: jangan pura-pura hybrid
+        raise semantic
+    if isinstance(fulltext, Exception) and isinstance(semantic, Exception):
+        raise fulltext
+    # Salah satu retrieval gagal sementara: pakai yang ada, tapi jangan di-cache
+    lists = [r for r in (fulltext, semantic) if not isinstance(r, Exception)]
+    results = reciprocal_rank_fusion(lists)
+    failed = semantic if isinstance(semantic, Exception) else fulltext
+    if isinstance(failed, Exception):
+        print(f"Hybrid search error: {failed}")
+        raise PartialResults(results, failed)
+    return results
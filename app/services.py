@@ -1,14 +1,14 @@
-from neo4j import GraphDatabase
 import os
-from dotenv import load_dotenv
+from neo4j import READ_ACCESS
+from app.db import get_driver
+from app import embedding_index
+from app.metrics import InstrumentedTx
 
-load_dotenv()
-
-uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-username = os.getenv("NEO4J_USERNAME", "neo4j")
-password = os.getenv("NEO4J_PASSWORD", "password")
-
-driver = GraphDatabase.driver(uri, auth=(username, password))
+# Batasan /run-query: timeout transaksi (detik), maksimal baris yang dikirim,
+# dan batas estimasi baris dari EXPLAIN (0 = cek cost dimatikan)
+RUN_QUERY_TIMEOUT = float(os.getenv("RUN_QUERY_TIMEOUT", "10"))
+RUN_QUERY_MAX_ROWS = int(os.getenv("RUN_QUERY_MAX_ROWS", "1000"))
+RUN_QUERY_MAX_ESTIMATED_ROWS = int(os.getenv("RUN_QUERY_MAX_ESTIMATED_ROWS", "1000000"))
 
 def is_read_only(query: str):
     write_keywords = ["CREATE", "MERGE", "SET", "DELETE", "INSERT", "CALL"]
@@ -18,18 +18,102 @@ def is_read_only(query: str):
     return True
 
 
-def run_custom_query(query: str):
+class QueryRejected(Exception):
+    pass
+
+def max_estimated_rows(plan):
+    # Ambil estimasi baris terbesar dari semua operator di plan EXPLAIN
+    if not plan:
+        return 0
+    own = plan.get("args", {}).get("EstimatedRows", 0) or 0
+    return max([own] + [max_estimated_rows(child) for child in plan.get("children", [])])
+
+# Scan seluruh label / seluruh graph: baru aman kalau ada Limit di atasnya
+FULL_SCAN_OPERATORS = {
+    "AllNodesScan", "NodeByLabelScan", "UnionNodeByLabelsScan", "IntersectionNodeByLabelsScan",
+    "DirectedAllRelationshipsScan", "UndirectedAllRelationshipsScan",
+    "DirectedRelationshipTypeScan", "UndirectedRelationshipTypeScan",
+}
+# Operator yang tetap menghabiskan seluruh input walau ada Limit di atasnya
+EAGER_OPERATORS = {"EagerAggregation", "OrderedAggregation", "Sort", "Top", "Distinct", "Eager"}
+LIMIT_OPERATORS = {"Limit", "ExhaustiveLimit"}
+
+def unbounded_scan(plan, limited=False):
+    # Cari operator full scan yang hasilnya tidak dibatasi Limit (nama operator bisa ber-suffix "@neo4j")
+    if not plan:
+        return None
+    operator = plan.get("operatorType", "").split("@")[0]
+    if operator in FULL_SCAN_OPERATORS and not limited:
+        return operator
+    if operator in LIMIT_OPERATORS:
+        limited = True
+    elif operator in EAGER_OPERATORS:
+        limited = False
+    for child in plan.get("children", []):
+        found = unbounded_scan(child, limited)
+        if found:
+            return found
+    return None
+
+async def check_query_cost(tx, query):
+    if RUN_QUERY_MAX_ESTIMATED_ROWS <= 0:
+        return
+    result = await tx.run(f"EXPLAIN {query}")
+    summary = await result.consume()
+    scan = unbounded_scan(summary.plan)
+    if scan:
+        raise QueryRejected(
+            f"query too expensive: plan uses {scan} without a LIMIT. "
+            f"Add a LIMIT or a more selective MATCH."
+        )
+    estimated = max_estimated_rows(summary.plan)
+    if estimated > RUN_QUERY_MAX_ESTIMATED_ROWS:
+        raise QueryRejected(
+            f"query too expensive: planner estimates {int(estimated)} rows "
+            f"(max {RUN_QUERY_MAX_ESTIMATED_ROWS}). Add a LIMIT or a more selective MATCH."
+        )
+
+async def stream_custom_query(query: str, max_rows: int):
+    """
+    Jalankan query user di read transaction dengan timeout server-side,
+    lalu yield record satu per satu (tidak di-materialize ke list).
+    Berhenti setelah `max_rows` record.
+    """
     if not(is_read_only(query)):
-        return {"error": "query should be read-only."}
-    
+        raise QueryRejected("query should be read-only.")
+
+    # fetch_size = max_rows: server cuma diminta (PULL) sebanyak row cap,
+    # bukan terus menghitung record yang toh akan dibuang
+    async with get_driver().session(default_access_mode=READ_ACCESS, fetch_size=max_rows) as session:
+        tx = InstrumentedTx(await session.begin_transaction(timeout=RUN_QUERY_TIMEOUT), "run_custom_query")
+        result = None
+        try:
+            await check_query_cost(tx, query)
+            result = await tx.run(query)
+            count = 0
+            async for record in result:
+                yield record.data()
+                count += 1
+                if count >= max_rows:
+                    break
+        finally:
+            if result is not None:
+                # Kepotong / client putus: jangan consume() (server bakal
+                # menjalankan sisa query), catat metric dari yang sudah dibaca
+                result.abandon()
+            # Read-only, jadi cukup di-close (rollback) tanpa commit
+            await tx.close()
+
+async def run_custom_query(query: str, limit: int = None):
+    limit = min(limit or RUN_QUERY_MAX_ROWS, RUN_QUERY_MAX_ROWS)
     try:
-        with driver.session() as session:
-            result = session.run(query)
-            return [record.data() for record in result]
+        # Ambil limit+1 untuk tahu hasilnya kepotong atau tidak
+        rows = [row async for row in stream_custom_query(query, limit + 1)]
     except Exception as e:
         return {"error": str(e)}
+    return {"rows": rows[:limit], "truncated": len(rows) > limit}
 
-def search_graph(search_term: str):
+async def search_graph(tx, search_term: str):
     fuzzy_term = f"{search_term}~"
     
     # Update Query Search: Ambil detail lengkap untuk kartu hasil search
@@ -72,47 +156,81 @@ def search_graph(search_term: str):
     LIMIT 50
     """
     
-    try:
-        with driver.session() as session:
-            result = session.run(cypher_query, term=fuzzy_term, raw=search_term.lower())
-            records = [
-                {
-                    "id": record["id"],
-                    "type": record["type"],
-                    "label": record["label"],
-                    "score": record["score"],
-                    "details": record["details"]
-                } 
-                for record in result
-            ]
-            return records
-    except Exception as e:
-        print(f"Search Error: {e}")
-        return []
+    result = await tx.run(cypher_query, term=fuzzy_term, raw=search_term.lower())
+    records = [
+        {
+            "id": record["id"],
+            "type": record["type"],
+            "label": record["label"],
+            "score": record["score"],
+            "details": record["details"]
+        } 
+        async for record in result
+    ]
+    return records
+
+
+SIMILAR_FALLBACK_QUERY = """
+MATCH (a:Artwork {id: $art_id})
+WHERE a.embedding IS NOT NULL
+// Kita cari 6, nanti yang ke-1 pasti dirinya sendiri (skor 1.0), jadi kita skip
+CALL db.index.vector.queryNodes('art_embeddings_index', 6, a.embedding)
+YIELD node as similar, score
+WHERE similar.id <> a.id  // Pastikan bukan lukisan itu sendiri
+RETURN collect({
+    id: similar.id,
+    title: similar.title,
+    url: similar.image_url,
+    score: score
+})[..5] as similar_artworks
+"""
 
+SIMILAR_BY_IDS_QUERY = """
+UNWIND $hits AS hit
+MATCH (similar:Artwork {id: hit.id})
+RETURN collect({
+    id: similar.id,
+    title: similar.title,
+    url: similar.image_url,
+    score: hit.score
+}) as similar_artworks
+"""
 
-def get_artwork_by_id(tx, art_id):
-    # UPDATE: Tambahkan bagian Vector Search untuk rekomendasi
+async def get_similar_fallback(tx, art_id):
+    # Hanya untuk artwork yang belum diproses compute_similar_artworks() di ETL
+    # (belum punya relasi SIMILAR_TO). Kalau index in-process tersedia, pakai itu
+    # dulu; vector search live di Neo4j jadi pilihan terakhir.
+    index = embedding_index.get_index()
+    if index is not None and int(art_id) in index:
+        hits = [{"id": i, "score": score} for i, score in index.neighbours(int(art_id), k=5)]
+        cursor = await tx.run(SIMILAR_BY_IDS_QUERY, hits=hits)
+        result = await cursor.single()
+        return result["similar_artworks"] if result else []
+
+    cursor = await tx.run(SIMILAR_FALLBACK_QUERY, art_id=int(art_id))
+    result = await cursor.single()
+    return result["similar_artworks"] if result else []
+
+async def get_artwork_by_id(tx, art_id):
     query = """
     MATCH (a:Artwork {id: $art_id})
     
     // 1. AMBIL DETAIL UTAMA (Sama kayak sebelumnya)
     OPTIONAL MATCH (a)-[:CREATED_BY]->(artist:Artist)
     
-    // 2. FITUR AI: CARI YANG MIRIP (Nearest Neighbor)
-    // Menggunakan index 'art_embeddings_index' yang sudah kita buat
-    // Kita cari 6, nanti yang ke-1 pasti dirinya sendiri (skor 1.0), jadi kita skip
-    CALL db.index.vector.queryNodes('art_embeddings_index', 6, a.embedding)
-    YIELD node as similar, score
-    WHERE similar.id <> a.id  // Pastikan bukan lukisan itu sendiri
+    // 2. FITUR AI: KARYA MIRIP
+    // Tetangga terdekat sudah dihitung saat ETL (compute_similar_artworks)
+    // dan disimpan sebagai relasi SIMILAR_TO {score}
+    OPTIONAL MATCH (a)-[s:SIMILAR_TO]->(similar:Artwork)
+    WITH a, artist, s, similar ORDER BY s.score DESC
     
-    // Kumpulkan 5 rekomendasi terbaik
-    WITH a, artist, collect({
+    // Kumpulkan 5 rekomendasi terbaik (collect otomatis buang null)
+    WITH a, artist, collect(CASE WHEN similar IS NULL THEN null ELSE {
         id: similar.id,
         title: similar.title,
         url: similar.image_url,
-        score: score
-    })[..5] as similar_artworks
+        score: s.score
+    } END)[..5] as similar_artworks
     
     RETURN a.id AS id, 
            a.title AS title, 
@@ -132,12 +250,18 @@ def get_artwork_by_id(tx, art_id):
            artist.period AS period,
            artist.school AS school,
            
-           similar_artworks  // <--- RETURN BARU
+           similar_artworks,
+           a.similar_k IS NOT NULL AS similar_ready
     """
-    result = tx.run(query, art_id=int(art_id)).single()
+    cursor = await tx.run(query, art_id=int(art_id))
+    result = await cursor.single()
     
     if not result:
         return None
+
+    similar_artworks = result["similar_artworks"]
+    if not result["similar_ready"]:
+        similar_artworks = await get_similar_fallback(tx, art_id)
         
     return {
         "artwork": {
@@ -163,13 +287,45 @@ def get_artwork_by_id(tx, art_id):
             "school": result["school"],
             "type": "Artist"
         } if result["artist_name"] else None,
-        "similar": result["similar_artworks"] # Masukkan ke response JSON
+        "similar": similar_artworks # Masukkan ke response JSON
     }
 
-def get_artist_by_name(tx, artist_name):
-    query = """
-    MATCH (a:Artist {original_name: $name})
-    OPTIONAL MATCH (w:Artwork)-[:CREATED_BY]->(a)
+# Karya tanpa tahun yang bisa di-parse ditaruh di akhir urutan
+UNKNOWN_YEAR_KEY = 9999
+
+ARTIST_ARTWORK_ORDER = {
+    "id": ("w.id > $after_id", "w.id"),
+    "year": (
+        "(year_key > $after_year OR (year_key = $after_year AND w.id > $after_id))",
+        "year_key, w.id",
+    ),
+}
+
+def parse_artwork_cursor(cursor, sort="id"):
+    """Cursor keyset: '<id>' untuk sort=id, '<year>:<id>' untuk sort=year."""
+    if not cursor:
+        return None, None
+    if sort == "year":
+        year, art_id = cursor.split(":", 1)
+        return int(year), int(art_id)
+    return None, int(cursor)
+
+def make_artwork_cursor(artwork, sort="id"):
+    if sort == "year":
+        return f"{artwork['year_key']}:{artwork['id']}"
+    return str(artwork["id"])
+
+async def get_artist_by_name(tx, artist_name, limit=24, cursor=None, sort="id"):
+    if sort not in ARTIST_ARTWORK_ORDER:
+        raise ValueError(f"sort harus salah satu dari {list(ARTIST_ARTWORK_ORDER)}")
+    after_year, after_id = parse_artwork_cursor(cursor, sort)
+    after_clause, order_by = ARTIST_ARTWORK_ORDER[sort]
+
+    # ORDER BY + LIMIT didorong ke Cypher, jadi payload & waktu query
+    # tetap kecil walaupun artist-nya punya ratusan karya.
+    # Ambil limit+1 untuk tahu masih ada halaman berikutnya atau tidak.
+    query = f"""
+    MATCH (a:Artist {{original_name: $name}})
     RETURN a.original_name AS name, 
            a.bio AS bio, 
            a.nationality AS nationality,
@@ -178,21 +334,36 @@ def get_artist_by_name(tx, artist_name):
            a.death_year AS d_year,
            a.period AS period,
            a.school AS school,
+
+           COUNT {{ (:Artwork)-[:CREATED_BY]->(a) }} AS total_artworks,
            
-           collect({
-               id: w.id,
-               title: w.title,
-               url: w.image_url,
-               year: w.year_created,
-               medium: w.medium
-           }) AS artworks
+           COLLECT {{
+               MATCH (w:Artwork)-[:CREATED_BY]->(a)
+               WITH w, coalesce(toInteger(w.year_created), {UNKNOWN_YEAR_KEY}) AS year_key
+               WHERE $after_id IS NULL OR {after_clause}
+               WITH w, year_key
+               ORDER BY {order_by}
+               LIMIT $fetch
+               RETURN {{
+                   id: w.id,
+                   title: w.title,
+                   url: w.image_url,
+                   year: w.year_created,
+                   medium: w.medium,
+                   year_key: year_key
+               }}
+           }} AS artworks
     """
-    result = tx.run(query, name=artist_name.strip()).single()
+    result_cursor = await tx.run(
+        query, name=artist_name.strip(), after_id=after_id, after_year=after_year, fetch=limit + 1
+    )
+    result = await result_cursor.single()
     
     if not result:
         return None
 
-    valid_artworks = [art for art in result["artworks"] if art["id"] is not None]
+    page = result["artworks"][:limit]
+    next_cursor = make_artwork_cursor(page[-1], sort) if len(result["artworks"]) > limit else None
 
     return {
         "id": result["name"],
@@ -205,21 +376,102 @@ def get_artist_by_name(tx, artist_name):
         "period": result["period"],
         "school": result["school"],
         "type": "Artist",
-        "artworks": valid_artworks
+        "artworks": [{k: v for k, v in art.items() if k != "year_key"} for art in page],
+        "total_artworks": result["total_artworks"],
+        "next_cursor": next_cursor
     }
 
-def get_location_details(tx, name):
+async def get_artworks_batch(tx, art_ids):
+    # Satu query UNWIND untuk semua id, urutan hasil ikut urutan input
+    query = """
+    UNWIND range(0, size($ids) - 1) AS idx
+    WITH idx, $ids[idx] AS art_id
+    OPTIONAL MATCH (a:Artwork {id: art_id})
+    OPTIONAL MATCH (a)-[:CREATED_BY]->(artist:Artist)
+    // Tetap satu baris per input walau ada artwork dengan >1 relasi CREATED_BY
+    WITH idx, art_id, a, collect(artist.original_name)[0] AS artist_name
+    RETURN idx,
+           art_id,
+           a IS NOT NULL AS found,
+           a.title AS title,
+           a.image_url AS url,
+           a.year_created AS year,
+           a.medium AS medium,
+           artist_name
+    ORDER BY idx
+    """
+    cursor = await tx.run(query, ids=[int(i) for i in art_ids])
+    results = []
+    async for r in cursor:
+        results.append({
+            "id": r["art_id"],
+            "found": r["found"],
+            "item": {
+                "id": r["art_id"],
+                "title": r["title"],
+                "url": r["url"],
+                "year": r["year"],
+                "medium": r["medium"],
+                "artist_name": r["artist_name"],
+                "type": "Artwork"
+            } if r["found"] else None
+        })
+    return results
+
+async def get_artists_batch(tx, names):
+    query = """
+    UNWIND range(0, size($names) - 1) AS idx
+    WITH idx, $names[idx] AS name
+    OPTIONAL MATCH (a:Artist {original_name: name})
+    RETURN idx,
+           name,
+           a IS NOT NULL AS found,
+           a.nationality AS nationality,
+           a.image_url AS image,
+           a.birth_year AS b_year,
+           a.death_year AS d_year,
+           a.period AS period,
+           CASE WHEN a IS NULL THEN 0 ELSE COUNT { (:Artwork)-[:CREATED_BY]->(a) } END AS artworks_count
+    ORDER BY idx
+    """
+    cursor = await tx.run(query, names=[n.strip() for n in names])
+    results = []
+    async for r in cursor:
+        results.append({
+            "id": r["name"],
+            "found": r["found"],
+            "item": {
+                "id": r["name"],
+                "name": r["name"],
+                "nationality": r["nationality"],
+                "image": r["image"],
+                "birth_year": r["b_year"],
+                "death_year": r["d_year"],
+                "period": r["period"],
+                "artworks_count": r["artworks_count"],
+                "type": "Artist"
+            } if r["found"] else None
+        })
+    return results
+
+async def get_location_details(tx, name):
     # Ambil detail Location + Top Artists + Top Artworks
     query = """
     MATCH (l:Location {name: $name})
     
     // 1. Ambil Artists yang based di sini
-    OPTIONAL MATCH (a:Artist)-[:BASED_IN]->(l)
-    WITH l, collect(DISTINCT {name: a.original_name, role: 'Resident'})[..12] as artists
-    
-    // 2. Ambil Artworks yang terkait lokasi ini (via string match atau relasi kalau ada)
-    OPTIONAL MATCH (art:Artwork) WHERE art.location CONTAINS $name
-    WITH l, artists, collect(DISTINCT {id: art.id, title: art.title, url: art.image_url})[..8] as artworks
+    // 2. Ambil Artworks lewat relasi LOCATED_IN (dibuat ETL, lihat
+    //    utils/graph_stages.py), bukan scan CONTAINS ke semua artwork.
+    //    LIMIT di dalam subquery, jadi biayanya tidak ikut membesar.
+    WITH l,
+         COLLECT {
+             MATCH (a:Artist)-[:BASED_IN]->(l)
+             RETURN DISTINCT {name: a.original_name, role: 'Resident'} LIMIT 12
+         } as artists,
+         COLLECT {
+             MATCH (art:Artwork)-[:LOCATED_IN]->(l)
+             RETURN DISTINCT {id: art.id, title: art.title, url: art.image_url} LIMIT 8
+         } as artworks
     
     RETURN l.name as name,
            l.description as description,
@@ -227,33 +479,79 @@ def get_location_details(tx, name):
            artists,
            artworks
     """
-    result = tx.run(query, name=name).single()
+    cursor = await tx.run(query, name=name)
+    result = await cursor.single()
     return result.data() if result else None
 
-def get_movement_details(tx, name):
-    # Ambil detail Period/Movement + Top Artists + Top Artworks
+async def get_movement_details(tx, name):
+    # Ringkasan sudah dimaterialisasi di node Period oleh
+    # utils/graph_stages.refresh_movement_summaries (ETL & worker Wikidata),
+    # jadi cukup baca satu node tanpa expand ke semua artist & artwork
     query = """
     MATCH (p:Period {name: $name})
-    
-    // 1. Ambil Artists di movement ini
-    OPTIONAL MATCH (a:Artist)-[:PART_OF_MOVEMENT]->(p)
-    WITH p, collect(DISTINCT {name: a.original_name})[..12] as artists
-    
-    // 2. Ambil Artworks dari artist di movement ini
-    OPTIONAL MATCH (a)-[:PART_OF_MOVEMENT]->(p)
-    MATCH (art:Artwork)-[:CREATED_BY]->(a)
-    WITH p, artists, collect(DISTINCT {id: art.id, title: art.title, url: art.image_url})[..8] as artworks
-    
     RETURN p.name as name,
            p.description as description,
            p.image_url as image,
-           artists,
-           artworks
+           p.summary_refreshed_at IS NOT NULL as has_summary,
+           [i IN range(0, size(coalesce(p.summary_artist_names, [])) - 1) | {
+               name: p.summary_artist_names[i],
+               artworks_count: p.summary_artist_counts[i]
+           }] as artists,
+           [i IN range(0, size(coalesce(p.summary_artwork_ids, [])) - 1) | {
+               id: p.summary_artwork_ids[i],
+               title: p.summary_artwork_titles[i],
+               url: CASE p.summary_artwork_urls[i] WHEN '' THEN null ELSE p.summary_artwork_urls[i] END
+           }] as artworks,
+           p.artist_count as artist_count,
+           p.artwork_count as artwork_count
     """
-    result = tx.run(query, name=name).single()
+    cursor = await tx.run(query, name=name)
+    result = await cursor.single()
+    if not result:
+        return None
+    if not result["has_summary"]:
+        # Period baru yang belum di-refresh: hitung live seperti dulu
+        return await get_movement_details_live(tx, name)
+    data = result.data()
+    data.pop("has_summary")
+    return data
+
+async def get_movement_details_live(tx, name, top_artists=12, sample_artworks=8):
+    # Period yang belum punya ringkasan: hitung live dengan aturan & bentuk
+    # response yang sama dengan refresh_movement_summaries
+    query = """
+    MATCH (p:Period {name: $name})
+    CALL {
+        WITH p
+        MATCH (a:Artist)-[:PART_OF_MOVEMENT]->(p)
+        WITH a, COUNT { (:Artwork)-[:CREATED_BY]->(a) } AS works
+        ORDER BY works DESC, a.original_name
+        RETURN collect({name: a.original_name, works: works}) AS ranked
+    }
+    CALL {
+        // Satu karya (id terkecil) dari tiap top artist sebagai contoh
+        WITH p
+        MATCH (a:Artist)-[:PART_OF_MOVEMENT]->(p)
+        WITH a ORDER BY COUNT { (:Artwork)-[:CREATED_BY]->(a) } DESC, a.original_name
+        LIMIT $sample_artworks
+        MATCH (art:Artwork)-[:CREATED_BY]->(a)
+        WITH a, art ORDER BY art.id
+        WITH a, head(collect(art)) AS art
+        RETURN collect({id: art.id, title: coalesce(art.title, ''), url: art.image_url}) AS artworks
+    }
+    RETURN p.name as name,
+           p.description as description,
+           p.image_url as image,
+           [r IN ranked[..$top_artists] | {name: r.name, artworks_count: r.works}] as artists,
+           artworks,
+           size(ranked) as artist_count,
+           reduce(total = 0, r IN ranked | total + r.works) as artwork_count
+    """
+    cursor = await tx.run(query, name=name, top_artists=top_artists, sample_artworks=sample_artworks)
+    result = await cursor.single()
     return result.data() if result else None
 
-def get_year_details(tx, year_value):
+async def get_year_details(tx, year_value):
     query = """
     MATCH (y:Year {value: $year})
     
@@ -276,9 +574,177 @@ def get_year_details(tx, year_value):
     """
     try:
         # Pastikan year di-cast ke integer
-        result = tx.run(query, year=int(year_value)).single()
+        cursor = await tx.run(query, year=int(year_value))
+        result = await cursor.single()
         return result.data() if result else None
     except ValueError:
         return None
 
 
+
+
+# --- Ekspansi graph untuk visualisasi (/graph/expand) ---
+
+EXPAND_RELATIONSHIPS = ("CREATED_BY", "PART_OF_MOVEMENT", "BASED_IN", "BORN_IN", "DIED_IN", "CREATED_IN")
+EXPAND_NODE_KEYS = {"Artist": "original_name", "Artwork": "id", "Period": "name", "Location": "name", "Year": "value"}
+EXPAND_MAX_NODES = int(os.getenv("EXPAND_MAX_NODES", "500"))
+EXPAND_MAX_EDGES = int(os.getenv("EXPAND_MAX_EDGES", "2000"))
+# Tetangga yang diperiksa per node (sampel), dan maksimal yang diambil dari sampel itu
+EXPAND_SCAN_LIMIT = int(os.getenv("EXPAND_SCAN_LIMIT", "500"))
+EXPAND_MAX_FANOUT = int(os.getenv("EXPAND_MAX_FANOUT", "50"))
+# Node dengan degree di atas ini (tahun populer, movement besar) tidak di-expand
+# lagi di level berikutnya, cukup ditampilkan dengan degree-nya
+EXPAND_SUPERNODE_DEGREE = int(os.getenv("EXPAND_SUPERNODE_DEGREE", "200"))
+
+_EXPAND_TYPES = "|".join(EXPAND_RELATIONSHIPS)
+
+
+def _node_fields(var):
+    return f"""{{
+        eid: elementId({var}),
+        type: CASE WHEN {var}:Artist THEN 'Artist' WHEN {var}:Artwork THEN 'Artwork'
+                   WHEN {var}:Year THEN 'Year' WHEN {var}:Period THEN 'Period' ELSE 'Location' END,
+        key: CASE WHEN {var}:Artist THEN {var}.original_name WHEN {var}:Artwork THEN {var}.id
+                  WHEN {var}:Year THEN {var}.value ELSE {var}.name END,
+        label: coalesce({var}.title, {var}.original_name, {var}.name, toString({var}.value)),
+        degree: COUNT {{ ({var})-[:{_EXPAND_TYPES}]-() }}
+    }}"""
+
+
+EXPAND_ROOT_QUERY = """
+MATCH (n:{label} {{{key}: $key}})
+RETURN {fields} AS node
+LIMIT 1
+"""
+
+EXPAND_LEVEL_QUERY = f"""
+UNWIND $frontier AS eid
+MATCH (n) WHERE elementId(n) = eid
+CALL {{
+    WITH n
+    MATCH (n)-[r:{_EXPAND_TYPES}]-(m)
+    // Supernode (misal Year populer) cuma disampel, tidak di-scan semua
+    WITH n, r, m LIMIT $scan
+    WITH n, r, {_node_fields("m")} AS node
+    // Dari sampel, dahulukan tetangga yang paling terhubung
+    ORDER BY node.degree DESC, node.label
+    LIMIT $fanout
+    RETURN collect({{rel: type(r), outgoing: startNode(r) = n, node: node}}) AS neighbours
+}}
+RETURN eid, neighbours
+"""
+
+
+class InvalidNodeRef(ValueError):
+    """Parameter node /graph/expand tidak valid; pesannya aman dikirim ke client."""
+
+
+def parse_node_ref(ref):
+    """'Artist:Claude Monet', 'Artwork:42', 'Year:1889', 'Period:...', 'Location:...'"""
+    label, sep, key = (ref or "").partition(":")
+    if not sep or label not in EXPAND_NODE_KEYS or not key:
+        raise InvalidNodeRef(f"node harus berbentuk <Label>:<key>, Label salah satu dari {list(EXPAND_NODE_KEYS)}")
+    if label in ("Artwork", "Year"):
+        try:
+            key = int(key)
+        except ValueError:
+            # Jangan teruskan pesan int() ("invalid literal for int() ...") ke client
+            raise InvalidNodeRef(f"Invalid node id for label {label}: expected an integer") from None
+    return label, key
+
+
+def make_node_ref(label, key):
+    return f"{label}:{key}"
+
+
+class GraphExpansion:
+    """Pembukuan BFS /graph/expand: node & edge unik plus budget keras keduanya."""
+
+    def __init__(self, node_limit, edge_limit):
+        self.node_limit = node_limit
+        self.edge_limit = edge_limit
+        self.nodes = {}
+        self.edges = {}
+        self.truncated = False
+
+    def fanout(self, frontier_size):
+        # Sisa budget dibagi rata ke frontier, jadi satu hub tidak menghabiskan semuanya
+        remaining = self.node_limit - len(self.nodes)
+        if remaining <= 0 or frontier_size == 0:
+            return 0
+        return max(1, min(EXPAND_MAX_FANOUT, remaining // frontier_size))
+
+    def add_node(self, label, key, text, degree):
+        ref = make_node_ref(label, key)
+        if ref in self.nodes:
+            return ref, False
+        if len(self.nodes) >= self.node_limit:
+            self.truncated = True
+            return None, False
+        self.nodes[ref] = {"id": ref, "type": label, "label": text, "degree": degree}
+        return ref, True
+
+    def add_edge(self, source, rel, target):
+        if (source, rel, target) in self.edges:
+            return
+        if len(self.edges) >= self.edge_limit:
+            self.truncated = True
+            return
+        self.edges[(source, rel, target)] = None
+
+    def expandable(self, degree):
+        return degree <= EXPAND_SUPERNODE_DEGREE
+
+    def result(self):
+        return {
+            "nodes": list(self.nodes.values()),
+            "edges": [{"source": s, "target": t, "type": rel} for s, rel, t in self.edges],
+            "truncated": self.truncated,
+        }
+
+
+def expand_limits(limit):
+    node_limit = min(limit, EXPAND_MAX_NODES)
+    return node_limit, min(node_limit * 4, EXPAND_MAX_EDGES)
+
+
+async def expand_graph(tx, node_ref, depth=1, limit=100):
+    """BFS dari satu node lewat relasi EXPAND_RELATIONSHIPS, dibatasi budget node & edge."""
+    label, key = parse_node_ref(node_ref)
+    expansion = GraphExpansion(*expand_limits(limit))
+
+    query = EXPAND_ROOT_QUERY.format(label=label, key=EXPAND_NODE_KEYS[label], fields=_node_fields("n"))
+    record = await (await tx.run(query, key=key)).single()
+    if not record:
+        return None
+    root = record["node"]
+    root_ref, _ = expansion.add_node(root["type"], root["key"], root["label"], root["degree"])
+
+    # eid Neo4j -> ref publik, hanya dipakai di dalam transaksi ini
+    frontier = {root["eid"]: root_ref}
+    for _ in range(depth):
+        fanout = expansion.fanout(len(frontier))
+        if not fanout:
+            expansion.truncated = True
+            break
+        cursor = await tx.run(
+            EXPAND_LEVEL_QUERY, frontier=list(frontier), scan=EXPAND_SCAN_LIMIT, fanout=fanout
+        )
+        next_frontier = {}
+        async for row in cursor:
+            source_ref = frontier[row["eid"]]
+            for item in row["neighbours"]:
+                node = item["node"]
+                ref, added = expansion.add_node(node["type"], node["key"], node["label"], node["degree"])
+                if ref is None:
+                    continue
+                if item["outgoing"]:
+                    expansion.add_edge(source_ref, item["rel"], ref)
+                else:
+                    expansion.add_edge(ref, item["rel"], source_ref)
+                if added and expansion.expandable(node["degree"]):
+                    next_frontier[node["eid"]] = ref
+        frontier = next_frontier
+        if not frontier:
+            break
+    return expansion.result()
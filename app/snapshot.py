@@ -0,0 +1,607 @@
+"""
+Mode serving dari snapshot graph in-memory (opt-in, env GRAPH_SNAPSHOT=1).
+
+Dataset-nya kecil (puluhan ribu Artwork, beberapa ribu Artist) dan cuma
+berubah saat ETL / worker Wikidata jalan, jadi node Artist, Artwork, Period,
+Location & Year beserta relasinya di-load sekali ke memori:
+
+- semua properti disimpan per kolom sebagai array int32 berisi kode ke
+  satu StringPool (string yang sama cuma disimpan sekali, -1 = null)
+- relasi disimpan sebagai adjacency CSR (offsets + targets) per tipe,
+  arah keluar dan masuk
+
+Service function di app/services.py dijawab dari snapshot tanpa Bolt round
+trip. Neo4j tetap source of truth: snapshot di-rebuild di background setiap
+data version berubah lalu di-swap atomik, dan selama versinya belum sama
+(atau datanya tidak ada di snapshot, misal SIMILAR_TO belum dihitung)
+request tetap diteruskan ke Neo4j.
+"""
+import asyncio
+import os
+import time
+import numpy as np
+from app import db, profiling
+from app.cache import data_version, DataVersion
+from app.services import (
+    ARTIST_ARTWORK_ORDER, UNKNOWN_YEAR_KEY, parse_artwork_cursor, make_artwork_cursor,
+    get_artwork_by_id, get_artist_by_name, get_artworks_batch, get_artists_batch,
+    get_location_details, get_movement_details, get_year_details,
+    EXPAND_RELATIONSHIPS, EXPAND_NODE_KEYS, EXPAND_SCAN_LIMIT, GraphExpansion,
+    expand_limits, parse_node_ref, expand_graph
+)
+
+SNAPSHOT_ENABLED = os.getenv("GRAPH_SNAPSHOT") == "1"
+# Rebuild yang gagal di-retry dengan backoff eksponensial sampai batas ini (detik)
+REBUILD_RETRY_MAX_DELAY = float(os.getenv("REBUILD_RETRY_MAX_DELAY", "60"))
+
+# label -> (property kunci, query load). Alias kolom = nama properti
+NODE_QUERIES = {
+    "Artist": ("original_name", """
+        MATCH (a:Artist)
+        RETURN a.original_name AS original_name, a.bio AS bio, a.nationality AS nationality,
+               a.base_location AS base_location, a.birth_year AS birth_year,
+               a.death_year AS death_year, a.period AS period, a.school AS school,
+               a.image_url AS image_url
+    """),
+    "Artwork": ("id", """
+        MATCH (w:Artwork)
+        RETURN w.id AS id, w.title AS title, w.image_url AS image_url,
+               w.year_created AS year_created, w.medium AS medium,
+               w.dimensions AS dimensions, w.location AS location,
+               w.raw_metadata AS raw_metadata, w.similar_k IS NOT NULL AS similar_ready
+        ORDER BY w.id
+    """),
+    "Period": ("name", "MATCH (p:Period) RETURN p.name AS name, p.description AS description, p.image_url AS image_url"),
+    "Location": ("name", "MATCH (l:Location) RETURN l.name AS name, l.description AS description, l.image_url AS image_url"),
+    "Year": ("value", "MATCH (y:Year) RETURN y.value AS value"),
+}
+
+# tipe relasi -> (label asal, label tujuan)
+RELATIONSHIPS = {
+    "CREATED_BY": ("Artwork", "Artist"),
+    "PART_OF_MOVEMENT": ("Artist", "Period"),
+    "BASED_IN": ("Artist", "Location"),
+    "BORN_IN": ("Artist", "Year"),
+    "DIED_IN": ("Artist", "Year"),
+    "CREATED_IN": ("Artwork", "Year"),
+    "LOCATED_IN": ("Artwork", "Location"),
+    "SIMILAR_TO": ("Artwork", "Artwork"),
+}
+
+# Dikembalikan handler kalau datanya tidak ada di snapshot -> tanya Neo4j
+FALLBACK = object()
+
+
+def relationship_query(rel):
+    source, target = RELATIONSHIPS[rel]
+    return f"""
+    MATCH (s:{source})-[r:{rel}]->(t:{target})
+    RETURN s.{NODE_QUERIES[source][0]} AS source, t.{NODE_QUERIES[target][0]} AS target, r.score AS weight
+    """
+
+
+def year_key(value):
+    # Sama dengan coalesce(toInteger(w.year_created), 9999) di get_artist_by_name
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return UNKNOWN_YEAR_KEY
+
+
+class StringPool:
+    """Intern semua nilai properti: tiap nilai unik disimpan sekali, dirujuk lewat kode int."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        if value is None:
+            return -1
+        # Kunci pakai tipe juga, biar True / 1 / 1.0 tidak tertukar
+        key = (type(value), value)
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def get(self, code):
+        return None if code < 0 else self.values[code]
+
+
+class NodeTable:
+    """Properti satu label, satu array kode StringPool per kolom."""
+
+    def __init__(self, pool, key, rows):
+        self.pool = pool
+        columns = list(rows[0]) if rows else [key]
+        self.columns = {
+            col: np.fromiter((pool.code(r[col]) for r in rows), dtype=np.int32, count=len(rows))
+            for col in columns
+        }
+        self._rows = {r[key]: i for i, r in enumerate(rows)}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row(self, key):
+        return self._rows.get(key)
+
+    def get(self, column, i):
+        return self.pool.get(int(self.columns[column][i]))
+
+    def nbytes(self):
+        return sum(col.nbytes for col in self.columns.values())
+
+
+class Adjacency:
+    """CSR: tetangga node i = targets[offsets[i]:offsets[i + 1]] (urut index tujuan)."""
+
+    def __init__(self, size, sources, targets, weights=None):
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        order = np.lexsort((targets, sources))
+        self.targets = targets[order]
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)[order]
+        self.offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=self.offsets[1:])
+
+    def __len__(self):
+        return len(self.targets)
+
+    def neighbours(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def neighbour_weights(self, i):
+        return self.weights[self.offsets[i]:self.offsets[i + 1]]
+
+    def degree(self, i):
+        return int(self.offsets[i + 1] - self.offsets[i])
+
+    def degrees(self):
+        return np.diff(self.offsets)
+
+    def nbytes(self):
+        return self.targets.nbytes + self.offsets.nbytes + (self.weights.nbytes if self.weights is not None else 0)
+
+
+def _unique(rows):
+    # Buang duplikat (relasi ganda) tapi pertahankan urutan
+    return list(dict.fromkeys(int(r) for r in rows))
+
+
+class GraphSnapshot:
+    def __init__(self, version, nodes, relationships):
+        self.version = version
+        self.built_at = time.time()
+        self.pool = StringPool()
+        self.tables = {label: NodeTable(self.pool, NODE_QUERIES[label][0], nodes[label]) for label in NODE_QUERIES}
+        self.artists = self.tables["Artist"]
+        self.artworks = self.tables["Artwork"]
+        self.artwork_ids = np.array([r["id"] for r in nodes["Artwork"]], dtype=np.int64)
+        self.year_keys = np.array([year_key(r["year_created"]) for r in nodes["Artwork"]], dtype=np.int32)
+
+        # out[rel]: asal -> tujuan, inc[rel]: tujuan -> asal
+        self.out, self.inc = {}, {}
+        for rel, (source_label, target_label) in RELATIONSHIPS.items():
+            source_table, target_table = self.tables[source_label], self.tables[target_label]
+            sources, targets, weights = [], [], []
+            for source, target, weight in relationships[rel]:
+                s, t = source_table.row(source), target_table.row(target)
+                if s is None or t is None:
+                    continue
+                sources.append(s)
+                targets.append(t)
+                weights.append(weight or 0.0)
+            weights = weights if rel == "SIMILAR_TO" else None
+            self.out[rel] = Adjacency(len(source_table), sources, targets, weights)
+            self.inc[rel] = Adjacency(len(target_table), targets, sources, weights)
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "nodes": {label: len(table) for label, table in self.tables.items()},
+            "relationships": {rel: len(adj) for rel, adj in self.out.items()},
+            "strings": len(self.pool),
+            "array_bytes": int(
+                sum(t.nbytes() for t in self.tables.values())
+                + sum(a.nbytes() for a in list(self.out.values()) + list(self.inc.values()))
+                + self.artwork_ids.nbytes + self.year_keys.nbytes
+            ),
+        }
+
+    # --- Bentuk data sama persis dengan service function di app/services.py ---
+
+    def _artwork_card(self, i):
+        return {"id": int(self.artwork_ids[i]), "title": self.artworks.get("title", i), "url": self.artworks.get("image_url", i)}
+
+    def _artist_of(self, artwork_row):
+        artists = self.out["CREATED_BY"].neighbours(artwork_row)
+        return int(artists[0]) if len(artists) else None
+
+    def artwork(self, art_id):
+        i = self.artworks.row(int(art_id))
+        if i is None:
+            return None
+        if not self.artworks.get("similar_ready", i):
+            # Tetangga belum dihitung ETL: biar get_similar_fallback yang jalan di Neo4j
+            return FALLBACK
+
+        similar = self.out["SIMILAR_TO"]
+        targets, scores = similar.neighbours(i), similar.neighbour_weights(i)
+        similar_artworks = [
+            dict(self._artwork_card(targets[pos]), score=float(scores[pos]))
+            for pos in np.argsort(-scores, kind="stable")[:5]
+        ]
+
+        works = self.artworks
+        artist = self._artist_of(i)
+        return {
+            "artwork": {
+                "id": int(self.artwork_ids[i]),
+                "title": works.get("title", i),
+                "url": works.get("image_url", i),
+                "year": works.get("year_created", i) or "Unknown Year",
+                "medium": works.get("medium", i) or "Unknown Medium",
+                "dimensions": works.get("dimensions", i) or "Unknown Dimensions",
+                "location": works.get("location", i) or "Unknown Location",
+                "description": works.get("raw_metadata", i),
+                "type": "Artwork"
+            },
+            "artist": {
+                "id": self.artists.get("original_name", artist),
+                "name": self.artists.get("original_name", artist),
+                "nationality": self.artists.get("nationality", artist),
+                "base": self.artists.get("base_location", artist),
+                "bio": self.artists.get("bio", artist),
+                "birth_year": self.artists.get("birth_year", artist),
+                "death_year": self.artists.get("death_year", artist),
+                "period": self.artists.get("period", artist),
+                "school": self.artists.get("school", artist),
+                "type": "Artist"
+            } if artist is not None else None,
+            "similar": similar_artworks
+        }
+
+    def artist(self, artist_name, limit=24, cursor=None, sort="id"):
+        if sort not in ARTIST_ARTWORK_ORDER:
+            raise ValueError(f"sort harus salah satu dari {list(ARTIST_ARTWORK_ORDER)}")
+        after_year, after_id = parse_artwork_cursor(cursor, sort)
+        i = self.artists.row(artist_name.strip())
+        if i is None:
+            return None
+
+        # Row artwork urut id, jadi neighbours() sudah urut untuk sort=id
+        works = self.inc["CREATED_BY"].neighbours(i)
+        ids, keys = self.artwork_ids[works], self.year_keys[works]
+        if sort == "year":
+            order = np.lexsort((ids, keys))
+            works, ids, keys = works[order], ids[order], keys[order]
+        if after_id is not None:
+            if sort == "year":
+                mask = (keys > after_year) | ((keys == after_year) & (ids > after_id))
+            else:
+                mask = ids > after_id
+            works, ids, keys = works[mask], ids[mask], keys[mask]
+
+        page = [
+            {
+                "id": int(ids[pos]),
+                "title": self.artworks.get("title", works[pos]),
+                "url": self.artworks.get("image_url", works[pos]),
+                "year": self.artworks.get("year_created", works[pos]),
+                "medium": self.artworks.get("medium", works[pos]),
+            }
+            for pos in range(min(limit, len(works)))
+        ]
+        next_cursor = None
+        if len(works) > limit:
+            next_cursor = make_artwork_cursor({"id": int(ids[limit - 1]), "year_key": int(keys[limit - 1])}, sort)
+
+        name = self.artists.get("original_name", i)
+        return {
+            "id": name,
+            "name": name,
+            "bio": self.artists.get("bio", i),
+            "nationality": self.artists.get("nationality", i),
+            "base": self.artists.get("base_location", i),
+            "birth_year": self.artists.get("birth_year", i),
+            "death_year": self.artists.get("death_year", i),
+            "period": self.artists.get("period", i),
+            "school": self.artists.get("school", i),
+            "type": "Artist",
+            "artworks": page,
+            "total_artworks": self.inc["CREATED_BY"].degree(i),
+            "next_cursor": next_cursor
+        }
+
+    def artworks_batch(self, art_ids):
+        results = []
+        for art_id in art_ids:
+            i = self.artworks.row(int(art_id))
+            artist = self._artist_of(i) if i is not None else None
+            results.append({
+                "id": int(art_id),
+                "found": i is not None,
+                "item": {
+                    "id": int(art_id),
+                    "title": self.artworks.get("title", i),
+                    "url": self.artworks.get("image_url", i),
+                    "year": self.artworks.get("year_created", i),
+                    "medium": self.artworks.get("medium", i),
+                    "artist_name": self.artists.get("original_name", artist) if artist is not None else None,
+                    "type": "Artwork"
+                } if i is not None else None
+            })
+        return results
+
+    def artists_batch(self, names):
+        results = []
+        for name in names:
+            name = name.strip()
+            i = self.artists.row(name)
+            results.append({
+                "id": name,
+                "found": i is not None,
+                "item": {
+                    "id": name,
+                    "name": name,
+                    "nationality": self.artists.get("nationality", i),
+                    "image": self.artists.get("image_url", i),
+                    "birth_year": self.artists.get("birth_year", i),
+                    "death_year": self.artists.get("death_year", i),
+                    "period": self.artists.get("period", i),
+                    "artworks_count": self.inc["CREATED_BY"].degree(i),
+                    "type": "Artist"
+                } if i is not None else None
+            })
+        return results
+
+    def location(self, name):
+        table = self.tables["Location"]
+        i = table.row(name)
+        if i is None:
+            return None
+        residents = _unique(self.inc["BASED_IN"].neighbours(i))[:12]
+        artworks = _unique(self.inc["LOCATED_IN"].neighbours(i))[:8]
+        return {
+            "name": table.get("name", i),
+            "description": table.get("description", i),
+            "image": table.get("image_url", i),
+            "artists": [{"name": self.artists.get("original_name", a), "role": "Resident"} for a in residents],
+            "artworks": [self._artwork_card(w) for w in artworks],
+        }
+
+    def movement(self, name, top_artists=12, sample_artworks=8):
+        # Ringkasan yang sama dengan refresh_movement_summaries, tapi selalu up to date
+        table = self.tables["Period"]
+        i = table.row(name)
+        if i is None:
+            return None
+        created_by = self.inc["CREATED_BY"]
+        members = _unique(self.inc["PART_OF_MOVEMENT"].neighbours(i))
+        ranked = sorted(
+            ((self.artists.get("original_name", a), created_by.degree(a), a) for a in members),
+            key=lambda item: (-item[1], item[0]),
+        )
+        samples = []
+        for _, works, a in ranked[:sample_artworks]:
+            if works:
+                card = self._artwork_card(created_by.neighbours(a)[0])
+                samples.append(dict(card, title=card["title"] or ""))
+        return {
+            "name": table.get("name", i),
+            "description": table.get("description", i),
+            "image": table.get("image_url", i),
+            "artists": [{"name": name, "artworks_count": works} for name, works, _ in ranked[:top_artists]],
+            "artworks": samples,
+            "artist_count": len(ranked),
+            "artwork_count": sum(works for _, works, _ in ranked),
+        }
+
+    def year(self, year_value):
+        try:
+            value = int(year_value)
+        except ValueError:
+            return None
+        i = self.tables["Year"].row(value)
+        if i is None:
+            return None
+        born = _unique(self.inc["BORN_IN"].neighbours(i))
+        died = _unique(self.inc["DIED_IN"].neighbours(i))
+        artworks = _unique(self.inc["CREATED_IN"].neighbours(i))[:12]
+        return {
+            "year": value,
+            "born_list": [{"name": self.artists.get("original_name", a), "role": "Born"} for a in born],
+            "died_list": [{"name": self.artists.get("original_name", a), "role": "Died"} for a in died],
+            "artworks": [self._artwork_card(w) for w in artworks],
+        }
+
+    # --- /graph/expand: BFS yang sama dengan expand_graph, tapi lewat CSR ---
+
+    def _degree(self, label, row):
+        degree = 0
+        for rel in EXPAND_RELATIONSHIPS:
+            source, target = RELATIONSHIPS[rel]
+            if source == label:
+                degree += self.out[rel].degree(row)
+            if target == label:
+                degree += self.inc[rel].degree(row)
+        return degree
+
+    def _text(self, label, row):
+        table = self.tables[label]
+        for column in ("title", "original_name", "name"):
+            if column in table.columns and table.get(column, row) is not None:
+                return table.get(column, row)
+        value = table.get("value", row) if "value" in table.columns else None
+        return None if value is None else str(value)
+
+    def _expand_candidates(self, label, row):
+        candidates = []
+        for rel in EXPAND_RELATIONSHIPS:
+            source, target = RELATIONSHIPS[rel]
+            # Supernode cuma disampel EXPAND_SCAN_LIMIT tetangga pertama
+            if source == label:
+                room = EXPAND_SCAN_LIMIT - len(candidates)
+                candidates += [(rel, True, target, int(t)) for t in self.out[rel].neighbours(row)[:room]]
+            if target == label:
+                room = EXPAND_SCAN_LIMIT - len(candidates)
+                candidates += [(rel, False, source, int(t)) for t in self.inc[rel].neighbours(row)[:room]]
+        return candidates
+
+    def expand(self, node_ref, depth=1, limit=100):
+        label, key = parse_node_ref(node_ref)
+        row = self.tables[label].row(key)
+        if row is None:
+            return None
+        expansion = GraphExpansion(*expand_limits(limit))
+        root_ref, _ = expansion.add_node(label, key, self._text(label, row), self._degree(label, row))
+
+        frontier = [(label, row, root_ref)]
+        for _ in range(depth):
+            fanout = expansion.fanout(len(frontier))
+            if not fanout:
+                expansion.truncated = True
+                break
+            next_frontier = []
+            for source_label, source_row, source_ref in frontier:
+                scored = []
+                for rel, outgoing, other_label, other_row in self._expand_candidates(source_label, source_row):
+                    text = self._text(other_label, other_row)
+                    scored.append((-self._degree(other_label, other_row), text is None, text or "", rel, outgoing, other_label, other_row))
+                scored.sort(key=lambda item: item[:3])
+                for neg_degree, _, text, rel, outgoing, other_label, other_row in scored[:fanout]:
+                    other_key = self.tables[other_label].get(EXPAND_NODE_KEYS[other_label], other_row)
+                    ref, added = expansion.add_node(other_label, other_key, text or None, -neg_degree)
+                    if ref is None:
+                        continue
+                    if outgoing:
+                        expansion.add_edge(source_ref, rel, ref)
+                    else:
+                        expansion.add_edge(ref, rel, source_ref)
+                    if added and expansion.expandable(-neg_degree):
+                        next_frontier.append((other_label, other_row, ref))
+            frontier = next_frontier
+            if not frontier:
+                break
+        return expansion.result()
+
+
+# Service function -> method snapshot dengan argumen yang sama (tanpa tx)
+HANDLERS = {
+    get_artwork_by_id: GraphSnapshot.artwork,
+    get_artist_by_name: GraphSnapshot.artist,
+    get_artworks_batch: GraphSnapshot.artworks_batch,
+    get_artists_batch: GraphSnapshot.artists_batch,
+    get_location_details: GraphSnapshot.location,
+    get_movement_details: GraphSnapshot.movement,
+    get_year_details: GraphSnapshot.year,
+    expand_graph: GraphSnapshot.expand,
+}
+
+
+async def load_graph(tx):
+    # Satu read transaction: versi & isi graph diambil bareng
+    version = await DataVersion.fetch_data_version(tx)
+    nodes = {}
+    for label, (_, query) in NODE_QUERIES.items():
+        nodes[label] = [record.data() async for record in await tx.run(query)]
+    relationships = {}
+    for rel in RELATIONSHIPS:
+        cursor = await tx.run(relationship_query(rel))
+        relationships[rel] = [(r["source"], r["target"], r["weight"]) async for r in cursor]
+    return version, nodes, relationships
+
+
+class SnapshotService:
+    def __init__(self, enabled=SNAPSHOT_ENABLED):
+        self.enabled = enabled
+        self.snapshot = None
+        self.hits = 0
+        self.fallbacks = 0
+        self._task = None
+        self._pending = None
+        self._attempted = asyncio.Event()
+
+    async def rebuild(self, version=None):
+        start = time.perf_counter()
+        version, nodes, relationships = await db.read(load_graph)
+        # Build array di luar event loop biar request lain tidak ketahan
+        snapshot = await asyncio.to_thread(GraphSnapshot, version, nodes, relationships)
+        # Swap atomik: request yang sedang jalan tetap pakai snapshot lama
+        self.snapshot = snapshot
+        stats = snapshot.stats()
+        print(
+            f"Graph snapshot v{version} siap: {sum(stats['nodes'].values())} node, "
+            f"{sum(stats['relationships'].values())} relasi dalam {time.perf_counter() - start:.2f}s"
+        )
+
+    def schedule_rebuild(self, version=None):
+        if not self.enabled:
+            return
+        self._pending = version
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._rebuild_until_current())
+
+    async def wait_ready(self, version=None):
+        """
+        Dipanggil saat startup: tunggu percobaan load snapshot pertama. Kalau
+        gagal, startup tetap jalan (fallback ke Neo4j) dan rebuild di-retry
+        di background.
+        """
+        if self.snapshot is None:
+            self.schedule_rebuild(version)
+        if self._task is not None:
+            await self._attempted.wait()
+
+    async def _rebuild_until_current(self):
+        delay = 1
+        while True:
+            version = self._pending
+            try:
+                await self.rebuild(version)
+            except Exception as e:
+                # Neo4j belum bisa dihubungi (misal saat startup): coba lagi,
+                # jangan tunggu data version berubah dulu
+                print(f"Graph snapshot rebuild error: {e} (retry dalam {delay}s)")
+                self._attempted.set()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, REBUILD_RETRY_MAX_DELAY)
+                continue
+            self._attempted.set()
+            delay = 1
+            if self._pending == version:
+                return
+
+    async def read(self, work, *args):
+        """Pengganti db.read(work, *args): jawab dari snapshot kalau bisa."""
+        snapshot = self.snapshot
+        handler = HANDLERS.get(work)
+        # Profiling harus benar-benar menjalankan query; snapshot versi lama
+        # (rebuild belum selesai) juga tidak boleh menjawab
+        if snapshot is not None and handler is not None and not profiling.active() \
+                and snapshot.version == data_version.value:
+            result = handler(snapshot, *args)
+            if result is not FALLBACK:
+                self.hits += 1
+                return result
+        if self.enabled:
+            self.fallbacks += 1
+        return await db.read(work, *args)
+
+    def stats(self):
+        stats = {"enabled": self.enabled, "hits": self.hits, "fallbacks": self.fallbacks}
+        if self.snapshot is not None:
+            stats.update(self.snapshot.stats())
+        return stats
+
+
+snapshot_service = SnapshotService()
+data_version.on_change(snapshot_service.schedule_rebuild)
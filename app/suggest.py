@@ -0,0 +1,179 @@
+"""
+Index prefix in-memory untuk /suggest (typeahead).
+
+Dibangun dari Artist.original_name & Artwork.title. Setiap label di-index
+per awal kata ("Vincent van Gogh" bisa ketemu dari "vin", "van", "gog"),
+disimpan sebagai array key yang sudah di-sort, jadi lookup cukup
+bisect + merge top-N per blok tanpa round trip ke Neo4j.
+"""
+import asyncio
+import heapq
+import os
+import time
+import unicodedata
+from bisect import bisect_left
+from app import db
+from app.cache import data_version
+
+LOAD_ARTISTS_QUERY = """
+MATCH (a:Artist)
+RETURN a.original_name AS id,
+       a.original_name AS label,
+       COUNT { (:Artwork)-[:CREATED_BY]->(a) } AS popularity
+"""
+
+LOAD_ARTWORKS_QUERY = """
+MATCH (w:Artwork)
+WHERE w.title IS NOT NULL
+OPTIONAL MATCH (w)-[:CREATED_BY]->(a:Artist)
+RETURN w.id AS id,
+       w.title AS label,
+       a.original_name AS artist,
+       // Popularitas karya = seberapa sering dia muncul sebagai rekomendasi
+       COUNT { (w)<-[:SIMILAR_TO]-() } AS popularity
+"""
+
+# Key yang sudah di-sort dibagi per blok; tiap blok menyimpan top-N entry
+# (urut ranking) supaya prefix pendek ("a") tetap murah tanpa membuang
+# entry populer yang letaknya jauh di belakang secara alfabet
+BLOCK_SIZE = 256
+MAX_LIMIT = 25
+REBUILD_RETRY_MAX_DELAY = float(os.getenv("REBUILD_RETRY_MAX_DELAY", "60"))
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        # entries: list of (type, id, label, popularity, extra)
+        self.entries = entries
+        pairs = []
+        for idx, (_, _, label, _, _) in enumerate(entries):
+            words = normalize(label).split(" ")
+            for start in range(len(words)):
+                pairs.append((" ".join(words[start:]), idx, start))
+        pairs.sort()
+        self.keys = [key for key, _, _ in pairs]
+        self.refs = [idx for _, idx, _ in pairs]
+        # Urutan ranking per key: match di awal label dulu (key dari kata
+        # pertama), lalu popularitas, lalu label terpendek
+        self.ranks = []
+        for _, idx, start in pairs:
+            _, _, label, popularity, _ = entries[idx]
+            self.ranks.append((start != 0, -(popularity or 0), len(label), label))
+        self.block_tops = [
+            self._distinct(sorted(range(b, min(b + BLOCK_SIZE, len(pairs))), key=self.ranks.__getitem__), MAX_LIMIT)
+            for b in range(0, len(pairs), BLOCK_SIZE)
+        ]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _distinct(self, positions, limit):
+        # Satu entry bisa muncul di beberapa key ("van gogh", "vincent van gogh"):
+        # ambil posisi terbaiknya saja
+        seen = set()
+        result = []
+        for pos in positions:
+            if self.refs[pos] not in seen:
+                seen.add(self.refs[pos])
+                result.append(pos)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def lookup(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        limit = min(limit, MAX_LIMIT)
+
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        rank = self.ranks.__getitem__
+        first_block = -(-lo // BLOCK_SIZE)
+        last_block = hi // BLOCK_SIZE
+        if first_block >= last_block:
+            candidates = sorted(range(lo, hi), key=rank)
+        else:
+            # Sisa di pinggir range di-scan langsung, blok penuh pakai top-N-nya
+            runs = [
+                sorted(range(lo, first_block * BLOCK_SIZE), key=rank),
+                sorted(range(last_block * BLOCK_SIZE, hi), key=rank),
+            ] + self.block_tops[first_block:last_block]
+            candidates = heapq.merge(*runs, key=rank)
+
+        results = []
+        for pos in self._distinct(candidates, limit):
+            kind, entry_id, label, popularity, extra = self.entries[self.refs[pos]]
+            results.append({"id": entry_id, "type": kind, "label": label, "score": popularity, "details": extra})
+        return results
+
+
+class SuggestService:
+    def __init__(self):
+        self.index = PrefixIndex([])
+        self.version = None
+        self.built_at = None
+        self._task = None
+        self._pending = None
+
+    async def load_entries(self, tx):
+        entries = []
+        cursor = await tx.run(LOAD_ARTISTS_QUERY)
+        async for r in cursor:
+            if r["label"]:
+                entries.append(("Artist", r["id"], r["label"], r["popularity"], {}))
+        cursor = await tx.run(LOAD_ARTWORKS_QUERY)
+        async for r in cursor:
+            entries.append(("Artwork", r["id"], r["label"], r["popularity"], {"artist_name_raw": r["artist"]}))
+        return entries
+
+    async def rebuild(self, version=None):
+        start = time.perf_counter()
+        entries = await db.read(self.load_entries)
+        # Build di luar event loop biar request lain tidak ketahan
+        index = await asyncio.to_thread(PrefixIndex, entries)
+        # Swap atomik: request yang sedang jalan tetap pakai index lama
+        self.index = index
+        self.version = version
+        self.built_at = time.time()
+        print(f"Suggest index rebuilt: {len(index)} entries dalam {time.perf_counter() - start:.2f}s")
+
+    def schedule_rebuild(self, version=None):
+        self._pending = version
+        if self._task is not None and not self._task.done():
+            # Rebuild yang sedang jalan akan mengulang sendiri kalau versinya ketinggalan
+            return
+        self._task = asyncio.get_running_loop().create_task(self._rebuild_until_current())
+
+    async def _rebuild_until_current(self):
+        delay = 1
+        while True:
+            version = self._pending
+            try:
+                await self.rebuild(version)
+            except Exception as e:
+                # Neo4j belum bisa dihubungi (misal saat startup): coba lagi,
+                # jangan tunggu data version berubah dulu
+                print(f"Suggest rebuild error: {e} (retry dalam {delay}s)")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, REBUILD_RETRY_MAX_DELAY)
+                continue
+            delay = 1
+            if self._pending == version:
+                return
+
+    def suggest(self, q, limit=10):
+        return self.index.lookup(q, limit)
+
+    def stats(self):
+        return {"entries": len(self.index), "keys": len(self.index.keys), "version": self.version, "built_at": self.built_at}
+
+
+suggest_service = SuggestService()
+data_version.on_change(suggest_service.schedule_rebuild)
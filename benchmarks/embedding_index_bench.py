@@ -0,0 +1,137 @@
+"""
+Benchmark recall & latency: index in-process (app/embedding_index.py)
+vs vector index Neo4j `art_embeddings_index`.
+
+    python -m benchmarks.embedding_index_bench --index data/embeddings --samples 200 --k 5
+
+Ground truth = exact dot product di atas embedding float32 asli: export
+float32 dari `--truth`, atau (kalau tidak diisi) diexport ulang dari Neo4j
+ke folder sementara. Jadi recall index lokal float16/int8 memang mengukur
+kerugian quantization, bukan membandingkan file yang sama dengan dirinya
+sendiri. Recall Neo4j ANN dihitung terhadap ground truth yang sama.
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import numpy as np
+from neo4j import GraphDatabase
+from app.db import uri, username, password
+from app.embedding_index import EmbeddingIndex, export_embeddings
+
+NEO4J_QUERY = """
+MATCH (a:Artwork {id: $art_id})
+CALL db.index.vector.queryNodes('art_embeddings_index', $k, a.embedding)
+YIELD node, score
+WHERE node.id <> a.id
+RETURN node.id AS id
+"""
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def summarize(latencies):
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+    }
+
+
+def exact_neighbours(truth, art_id, k):
+    # Brute force di atas index float32 (bukan index yang sedang diuji)
+    vec = truth.vector(art_id)
+    scores = np.asarray(truth.vectors, dtype=np.float32) @ vec
+    order = np.argsort(-scores)
+    return [int(truth.ids[row]) for row in order if int(truth.ids[row]) != art_id][:k]
+
+
+def ground_truth(index, truth_path, driver, samples, k):
+    """Sampel artwork + tetangga exact-nya dari embedding float32."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if truth_path:
+            exact = EmbeddingIndex.load(truth_path)
+        else:
+            print("📥 --truth tidak diisi: export embedding float32 dari Neo4j untuk ground truth...")
+            export_embeddings(driver, tmp_dir, dtype="float32")
+            exact = EmbeddingIndex.load(tmp_dir)
+        if exact.vectors.dtype != np.float32:
+            raise SystemExit(f"Ground truth harus export float32, bukan {exact.vectors.dtype}")
+
+        # Sampel hanya dari artwork yang ada di kedua sisi
+        candidates = np.asarray([i for i in index.ids if int(i) in exact])
+        rng = np.random.default_rng(42)
+        sample_ids = [int(i) for i in rng.choice(candidates, size=min(samples, len(candidates)), replace=False)]
+        truth = {art_id: set(exact_neighbours(exact, art_id, k)) for art_id in sample_ids}
+        del exact  # lepas mmap sebelum folder sementara dihapus
+    return sample_ids, truth
+
+
+def run(index, driver, sample_ids, truth, args):
+    # --- Lokal, satu query per panggilan ---
+    local_lat, local_hits = [], 0
+    for art_id in sample_ids:
+        t0 = time.perf_counter()
+        hits = index.neighbours(art_id, k=args.k)
+        local_lat.append(time.perf_counter() - t0)
+        local_hits += len(truth[art_id] & {i for i, _ in hits})
+
+    # --- Lokal, batched (matrix product sekaligus) ---
+    t0 = time.perf_counter()
+    for i in range(0, len(sample_ids), args.batch):
+        chunk = sample_ids[i : i + args.batch]
+        index.search(np.stack([index.vector(a) for a in chunk]), k=args.k, exclude_ids=chunk)
+    batched_per_query = (time.perf_counter() - t0) / len(sample_ids)
+
+    # --- Neo4j vector index ---
+    neo_lat, neo_hits = [], 0
+    with driver.session() as session:
+        for art_id in sample_ids:
+            t0 = time.perf_counter()
+            ids = [r["id"] for r in session.run(NEO4J_QUERY, art_id=art_id, k=args.k + 1)]
+            neo_lat.append(time.perf_counter() - t0)
+            neo_hits += len(truth[art_id] & set(ids[: args.k]))
+
+    total = len(sample_ids) * args.k
+    report = {
+        "samples": len(sample_ids),
+        "k": args.k,
+        "vectors": len(index),
+        "dtype": str(index.vectors.dtype),
+        "truth": args.truth or "neo4j float32 export",
+        "local": dict(summarize(local_lat), recall=round(local_hits / total, 4),
+                      batched_mean_ms=round(batched_per_query * 1000, 4)),
+        "neo4j": dict(summarize(neo_lat), recall=round(neo_hits / total, 4)),
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--index", required=True, help="Folder hasil `python -m app.embedding_index export`")
+    parser.add_argument("--truth", help="Export float32 untuk ground truth (default: export ulang dari Neo4j)")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=64, help="Ukuran batch query untuk throughput lokal")
+    parser.add_argument("--out", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    index = EmbeddingIndex.load(args.index)
+    driver = GraphDatabase.driver(uri, auth=(username, password))
+    try:
+        sample_ids, truth = ground_truth(index, args.truth, driver, args.samples, args.k)
+        report = run(index, driver, sample_ids, truth, args)
+    finally:
+        driver.close()
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Driver Neo4j palsu untuk benchmark overhead API murni (tanpa DB).
+
+- RecordingDriver membungkus AsyncDriver asli dan merekam hasil setiap
+  tx.run() (key = teks Cypher yang dinormalisasi).
+- ReplayDriver memutar ulang rekaman itu, jadi latency yang terukur cuma
+  FastAPI + serialisasi + cache + service layer.
+
+Keduanya cukup meniru bagian API driver yang dipakai app/ (session,
+execute_read, begin_transaction, run, single, data, async for, consume).
+"""
+import json
+
+
+def normalize_cypher(query):
+    return " ".join(str(getattr(query, "text", query)).split())
+
+
+class FakeRecord(dict):
+    def data(self, *keys):
+        return {k: self[k] for k in keys} if keys else dict(self)
+
+    def value(self, key=0):
+        return list(self.values())[key] if isinstance(key, int) else self[key]
+
+
+class FakeSummary:
+    result_available_after = 0
+    result_consumed_after = 0
+    counters = None
+    notifications = None
+    plan = None
+    profile = None
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = [FakeRecord(r) for r in rows]
+
+    async def single(self, strict=False):
+        return self._rows[0] if self._rows else None
+
+    async def data(self, *keys):
+        return [r.data(*keys) for r in self._rows]
+
+    async def consume(self):
+        return FakeSummary()
+
+    async def __aiter__(self):
+        for row in self._rows:
+            yield row
+
+
+class _Tx:
+    def __init__(self, driver):
+        self._driver = driver
+
+    async def run(self, query, parameters=None, **kwargs):
+        return await self._driver.answer(query, dict(parameters or {}, **kwargs))
+
+    async def close(self):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class _Session:
+    def __init__(self, driver):
+        self._driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute_read(self, work, *args, **kwargs):
+        return await work(_Tx(self._driver), *args, **kwargs)
+
+    execute_write = execute_read
+
+    async def begin_transaction(self, **kwargs):
+        return _Tx(self._driver)
+
+    async def run(self, query, parameters=None, **kwargs):
+        return await _Tx(self._driver).run(query, parameters, **kwargs)
+
+
+class ReplayDriver:
+    def __init__(self, recordings):
+        self.recordings = recordings
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["queries"])
+
+    def session(self, **kwargs):
+        return _Session(self)
+
+    async def answer(self, query, params):
+        rows = self.recordings.get(normalize_cypher(query))
+        if rows is None:
+            self.misses += 1
+            rows = []
+        return FakeResult(rows)
+
+    async def verify_connectivity(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class RecordingDriver(ReplayDriver):
+    """Jalankan query ke driver asli, simpan hasilnya untuk di-replay nanti."""
+
+    def __init__(self, real_driver):
+        super().__init__({})
+        self._real = real_driver
+
+    async def answer(self, query, params):
+        async with self._real.session() as session:
+            result = await session.run(query, params)
+            rows = await result.data()
+        # Satu contoh per teks query sudah cukup untuk ukur overhead API
+        self.recordings.setdefault(normalize_cypher(query), rows)
+        return FakeResult(rows)
+
+    async def verify_connectivity(self):
+        await self._real.verify_connectivity()
+
+    async def close(self):
+        await self._real.close()
+
+    def save(self, path, samples):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"samples": samples, "queries": self.recordings}, f, default=str)
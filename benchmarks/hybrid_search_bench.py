@@ -0,0 +1,74 @@
+"""
+Benchmark latency hybrid search vs fulltext-only (tanpa cache hasil).
+
+    python -m benchmarks.hybrid_search_bench --rounds 5 --out hybrid.json
+
+Untuk tiap query: fulltext-only (`search_graph`), hybrid dengan embedding
+query dingin (cache LRU dikosongkan) dan hybrid dengan embedding hangat.
+Target: p50 hybrid-hangat <= p50 fulltext-only, karena retrieval vector
+jalan paralel dengan fulltext.
+"""
+import argparse
+import asyncio
+import json
+import time
+from app import db, embedding_index, semantic
+from app.services import search_graph
+from benchmarks.embedding_index_bench import summarize
+
+DEFAULT_QUERIES = [
+    "monet", "van gogh", "stormy seascape", "portrait of a young woman",
+    "madonna and child", "still life with flowers", "rembrandt self portrait",
+    "winter landscape", "battle scene", "venice canal",
+]
+
+
+async def timed(fn, *args):
+    start = time.perf_counter()
+    await fn(*args)
+    return time.perf_counter() - start
+
+
+async def run(queries, rounds):
+    await db.init_driver()
+    embedding_index.load_default()
+    try:
+        # Load model & buka koneksi dulu supaya tidak ikut terukur
+        await asyncio.to_thread(semantic.embed_query, "warmup")
+        await db.read(search_graph, "warmup")
+
+        fulltext, hybrid_cold, hybrid_warm = [], [], []
+        for _ in range(rounds):
+            for q in queries:
+                fulltext.append(await timed(db.read, search_graph, q))
+                semantic.embed_query.cache_clear()
+                hybrid_cold.append(await timed(semantic.hybrid_search, q))
+                hybrid_warm.append(await timed(semantic.hybrid_search, q))
+        return {
+            "queries": len(queries),
+            "rounds": rounds,
+            "in_process_index": embedding_index.get_index() is not None,
+            "fulltext": summarize(fulltext),
+            "hybrid_cold_embedding": summarize(hybrid_cold),
+            "hybrid_warm_embedding": summarize(hybrid_warm),
+        }
+    finally:
+        await db.close_driver()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--query", action="append", help="Bisa diulang; default pakai daftar bawaan")
+    parser.add_argument("--out", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.query or DEFAULT_QUERIES, args.rounds))
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+"""
+Load benchmark endpoint API (/search, /artwork, /artist, /location, /movement, /year).
+
+1. Seed graph sintetis ke Neo4j LOKAL (hapus isi DB!), lalu jalankan stage
+   graph yang sama dengan ETL (LOCATED_IN, SIMILAR_TO, ringkasan movement)
+   supaya /artwork & /movement lewat jalur materialized seperti production:
+    python -m benchmarks.load_test seed --artists 2000 --artworks 20000 --yes-wipe
+    # --skip-graph-stages = ukur jalur fallback live (get_similar_fallback dst.)
+
+2. Jalankan beban dengan concurrency tetap:
+    # app in-process + Neo4j asli (NEO4J_URI)
+    python -m benchmarks.load_test run --concurrency 32 --duration 20 --out bench.json
+    # server yang sudah jalan
+    python -m benchmarks.load_test run --base-url http://127.0.0.1:8000 --out bench.json
+    # overhead API murni: rekam respons sekali, lalu replay tanpa DB
+    python -m benchmarks.load_test record --out recordings.json
+    python -m benchmarks.load_test run --replay recordings.json --out bench.json
+
+3. Bandingkan dua hasil (misal antar commit):
+    python -m benchmarks.load_test compare old.json new.json
+
+Tambahkan --no-cache supaya cache in-process (app/cache.py) dimatikan dan
+setiap request benar-benar sampai ke driver. Butuh `httpx` (pip install httpx).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import quote, urlparse
+
+SCENARIOS = ("search", "artwork", "artist", "location", "movement", "year")
+
+SEARCH_TERMS = ["monet", "van gogh", "portrait", "landscape", "madonna", "still life", "venice", "rembrandt"]
+
+DISCOVER_SAMPLES_QUERY = """
+CALL { MATCH (w:Artwork) RETURN collect(w.id)[..200] AS artworks }
+CALL { MATCH (a:Artist) RETURN collect(a.original_name)[..200] AS artists }
+CALL { MATCH (l:Location) RETURN collect(l.name)[..100] AS locations }
+CALL { MATCH (p:Period) RETURN collect(p.name)[..100] AS movements }
+CALL { MATCH (y:Year) RETURN collect(y.value)[..100] AS years }
+CALL { MATCH (w:Artwork) RETURN count(w) AS artwork_total, count(w.similar_k) AS similar_ready }
+CALL { MATCH (p:Period) RETURN count(p) AS period_total, count(p.summary_refreshed_at) AS summaries_ready }
+RETURN artworks, artists, locations, movements, years,
+       artwork_total, similar_ready, period_total, summaries_ready
+"""
+
+UTILS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utils")
+
+
+def import_graph_stages():
+    # Modul utils/ pakai import sibling (from data_clean import ...)
+    if UTILS_DIR not in sys.path:
+        sys.path.insert(0, UTILS_DIR)
+    import graph_stages
+    return graph_stages
+
+
+def measured_paths(samples):
+    """Jalur yang benar-benar diukur: materialized (hasil stage ETL) atau fallback live."""
+    if "similar_ready" not in samples:
+        return None  # rekaman lama
+
+    def path(ready, total):
+        if not total:
+            return "n/a"
+        if ready == total:
+            return "materialized"
+        return "fallback" if ready == 0 else f"mixed ({ready}/{total} materialized)"
+
+    return {
+        "artwork": path(samples["similar_ready"], samples["artwork_total"]),
+        "movement": path(samples["summaries_ready"], samples["period_total"]),
+    }
+
+
+# --- Seed graph sintetis ---
+
+def seed_graph(uri, auth, artists, artworks, periods, locations, with_embeddings, batch_size=1000,
+               run_graph_stages=True):
+    import numpy as np
+    from neo4j import GraphDatabase
+
+    rng = random.Random(42)
+    np_rng = np.random.default_rng(42)
+    driver = GraphDatabase.driver(uri, auth=auth)
+    try:
+        with driver.session() as session:
+            print("🧹 Menghapus isi DB benchmark...")
+            # GraphMeta dibiarkan: data version tetap monoton
+            session.run(
+                "MATCH (n) WHERE NOT n:GraphMeta CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS"
+            ).consume()
+            session.run("CREATE CONSTRAINT artist_uniq IF NOT EXISTS FOR (a:Artist) REQUIRE a.original_name IS UNIQUE")
+            session.run("CREATE CONSTRAINT artwork_uniq IF NOT EXISTS FOR (a:Artwork) REQUIRE a.id IS UNIQUE")
+            session.run("CREATE INDEX location_name IF NOT EXISTS FOR (l:Location) ON (l.name)")
+            session.run("CREATE INDEX period_name IF NOT EXISTS FOR (p:Period) ON (p.name)")
+            session.run("CREATE INDEX year_value IF NOT EXISTS FOR (y:Year) ON (y.value)")
+            session.run("""
+                CREATE FULLTEXT INDEX search_art IF NOT EXISTS
+                FOR (n:Artwork|Artist) ON EACH [n.title, n.original_name, n.nationality, n.period]
+            """)
+            if with_embeddings:
+                session.run("""
+                    CREATE VECTOR INDEX art_embeddings_index IF NOT EXISTS
+                    FOR (n:Artwork) ON (n.embedding)
+                    OPTIONS {indexConfig: {`vector.dimensions`: 384, `vector.similarity_function`: 'cosine'}}
+                """)
+
+            period_names = [f"Movement {i:03d}" for i in range(periods)]
+            location_names = [f"City {i:03d}" for i in range(locations)]
+            session.run("UNWIND $names AS name MERGE (:Period {name: name})", names=period_names)
+            session.run("UNWIND $names AS name MERGE (:Location {name: name})", names=location_names)
+            session.run("UNWIND range(1200, 1950) AS v MERGE (:Year {value: v})")
+
+            print(f"👩‍🎨 Seed {artists} artists...")
+            artist_rows = []
+            for i in range(artists):
+                born = rng.randint(1250, 1880)
+                artist_rows.append({
+                    "name": f"Artist {i:05d}",
+                    "born": born,
+                    "died": born + rng.randint(25, 90),
+                    "period": rng.choice(period_names),
+                    "base": rng.choice(location_names),
+                })
+            for i in range(0, artists, batch_size):
+                session.run("""
+                    UNWIND $batch AS row
+                    MERGE (a:Artist {original_name: row.name})
+                    SET a.birth_year = row.born, a.death_year = row.died,
+                        a.period = row.period, a.base_location = row.base,
+                        a.nationality = 'Synthetic', a.bio = 'Synthetic artist for benchmarks.'
+                    WITH a, row
+                    MATCH (p:Period {name: row.period}) MERGE (a)-[:PART_OF_MOVEMENT]->(p)
+                    WITH a, row
+                    MATCH (l:Location {name: row.base}) MERGE (a)-[:BASED_IN]->(l)
+                    WITH a, row
+                    MATCH (yb:Year {value: row.born}) MERGE (a)-[:BORN_IN]->(yb)
+                    WITH a, row
+                    OPTIONAL MATCH (yd:Year {value: row.died})
+                    FOREACH (_ IN CASE WHEN yd IS NULL THEN [] ELSE [1] END | MERGE (a)-[:DIED_IN]->(yd))
+                """, batch=artist_rows[i : i + batch_size])
+
+            print(f"🖼️ Seed {artworks} artworks...")
+            # Distribusi skewed: sedikit artist punya banyak karya (mirip data asli)
+            weights = [1.0 / (rank + 1) for rank in range(artists)]
+            for start in range(0, artworks, batch_size):
+                batch = []
+                for art_id in range(start, min(start + batch_size, artworks)):
+                    artist = rng.choices(artist_rows, weights=weights)[0]
+                    year = rng.randint(artist["born"] + 15, min(artist["died"], 1950))
+                    row = {
+                        "id": art_id,
+                        "title": f"{rng.choice(['Portrait', 'Landscape', 'Still Life', 'Madonna', 'Seascape'])} {art_id}",
+                        "artist": artist["name"],
+                        "year": year,
+                        "location": rng.choice(location_names),
+                    }
+                    if with_embeddings:
+                        vec = np_rng.normal(size=384).astype("float32")
+                        row["embedding"] = (vec / np.linalg.norm(vec)).tolist()
+                    batch.append(row)
+                session.run("""
+                    UNWIND $batch AS row
+                    MERGE (w:Artwork {id: row.id})
+                    SET w.title = row.title, w.year_created = toString(row.year),
+                        w.medium = 'Oil on canvas', w.dimensions = '50 x 70 cm',
+                        w.location = row.location, w.image_url = 'https://example.org/' + row.id + '.jpg',
+                        w.embedding = row.embedding
+                    WITH w, row
+                    MATCH (a:Artist {original_name: row.artist}) MERGE (w)-[:CREATED_BY]->(a)
+                    WITH w, row
+                    MATCH (y:Year {value: row.year}) MERGE (w)-[:CREATED_IN]->(y)
+                    WITH w, row
+                    MATCH (l:Location {name: row.location}) MERGE (w)-[:LOCATED_IN]->(l)
+                """, batch=batch)
+                print(f"   ⏳ {min(start + batch_size, artworks)}/{artworks}", end="\r")
+        print()
+
+        if run_graph_stages:
+            # Stage yang sama dengan ETL, supaya endpoint lewat jalur production
+            stages = import_graph_stages()
+            stages.link_artwork_locations(driver)
+            if with_embeddings:
+                stages.compute_similar_artworks(driver)
+            stages.refresh_movement_summaries(driver)
+        else:
+            print("⚠️ Stage graph dilewati: /artwork & /movement akan lewat jalur fallback live.")
+
+        with driver.session() as session:
+            session.run("""
+                MERGE (m:GraphMeta {key: 'graph'})
+                SET m.data_version = coalesce(m.data_version, 0) + 1, m.updated_by = 'benchmark_seed'
+            """)
+        print("✅ Seed selesai.")
+    finally:
+        driver.close()
+
+
+# --- Menjalankan beban ---
+
+def build_paths(samples, rng, count):
+    paths = []
+    for i in range(count):
+        scenario = SCENARIOS[i % len(SCENARIOS)]
+        if scenario == "search":
+            path = f"/search?q={quote(rng.choice(SEARCH_TERMS))}"
+        else:
+            pool = samples.get(f"{scenario}s" if scenario != "artwork" else "artworks") or []
+            if not pool:
+                continue
+            value = rng.choice(pool)
+            path = f"/{scenario}/{quote(str(value), safe='')}"
+        paths.append((scenario, path))
+    return paths
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def summarize(latencies, errors, elapsed):
+    ms = [v * 1000 for v in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0,
+        "p50_ms": round(percentile(ms, 50), 3) if ms else None,
+        "p95_ms": round(percentile(ms, 95), 3) if ms else None,
+        "p99_ms": round(percentile(ms, 99), 3) if ms else None,
+    }
+
+
+async def drive(client, paths, concurrency, duration):
+    latencies = {name: [] for name in SCENARIOS}
+    errors = {name: 0 for name in SCENARIOS}
+    deadline = time.perf_counter() + duration
+    cursor = 0
+
+    async def worker():
+        nonlocal cursor
+        while time.perf_counter() < deadline:
+            scenario, path = paths[cursor % len(paths)]
+            cursor += 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                ok = response.status_code < 500
+            except Exception:
+                ok = False
+            latencies[scenario].append(time.perf_counter() - start)
+            if not ok:
+                errors[scenario] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    everything = [v for values in latencies.values() for v in values]
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(everything, sum(errors.values()), elapsed),
+        "endpoints": {name: summarize(latencies[name], errors[name], elapsed) for name in SCENARIOS},
+    }
+
+
+async def discover_samples():
+    from app import db
+
+    async def fetch(tx):
+        cursor = await tx.run(DISCOVER_SAMPLES_QUERY)
+        record = await cursor.single()
+        return record.data() if record else {}
+
+    return await db.read(fetch)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+async def run_benchmark(args):
+    import httpx
+
+    rng = random.Random(args.seed)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30)
+        from app import db
+        await db.init_driver()
+        try:
+            samples = await discover_samples()
+        finally:
+            await db.close_driver()
+        mode = "http"
+        return await _run_with_client(client, samples, rng, args, mode)
+
+    from app import db
+    from app.main import app
+    from benchmarks.fake_driver import ReplayDriver
+
+    if args.replay:
+        with open(args.replay, "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+        samples = recorded["samples"]
+        replay = ReplayDriver(recorded["queries"])
+
+        async def init_replay_driver():
+            db.driver = replay
+            return replay
+
+        db.init_driver = init_replay_driver
+        mode = "replay"
+    else:
+        mode = "in-process"
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        if not args.replay:
+            samples = await discover_samples()
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30)
+        return await _run_with_client(client, samples, rng, args, mode)
+
+
+async def _run_with_client(client, samples, rng, args, mode):
+    paths = build_paths(samples, rng, 5000)
+    async with client:
+        if args.warmup:
+            await drive(client, paths, args.concurrency, args.warmup)
+        result = await drive(client, paths, args.concurrency, args.duration)
+    result.update({
+        "mode": mode,
+        "graph_paths": measured_paths(samples),
+        "commit": git_commit(),
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "cache": not args.no_cache,
+    })
+    return result
+
+
+async def record_responses(out):
+    from app import db
+    from app.main import app
+    from benchmarks.fake_driver import RecordingDriver
+    import httpx
+
+    real_init = db.init_driver
+    recorder = None
+
+    async def init_recording_driver():
+        nonlocal recorder
+        real = await real_init()
+        recorder = RecordingDriver(real)
+        db.driver = recorder
+        return recorder
+
+    db.init_driver = init_recording_driver
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        samples = await discover_samples()
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for _, path in build_paths(samples, random.Random(0), 60):
+                await client.get(path)
+    recorder.save(out, samples)
+    print(f"✅ {len(recorder.recordings)} query direkam ke {out}")
+
+
+def compare(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    if old.get("graph_paths") != new.get("graph_paths"):
+        print(f"⚠️ Jalur graph beda: {old.get('graph_paths')} vs {new.get('graph_paths')}")
+    print(f"{'endpoint':<10} {'metric':<8} {old.get('commit') or 'old':>12} {new.get('commit') or 'new':>12} {'delta':>8}")
+    for name in ("overall",) + SCENARIOS:
+        before = old["overall"] if name == "overall" else old["endpoints"].get(name, {})
+        after = new["overall"] if name == "overall" else new["endpoints"].get(name, {})
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            a, b = before.get(metric), after.get(metric)
+            if a is None or b is None:
+                continue
+            delta = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+            print(f"{name:<10} {metric:<8} {a:>12} {b:>12} {delta:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark endpoint API")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed = sub.add_parser("seed", help="Isi Neo4j lokal dengan graph sintetis (menghapus data!)")
+    seed.add_argument("--artists", type=int, default=2000)
+    seed.add_argument("--artworks", type=int, default=20000)
+    seed.add_argument("--periods", type=int, default=40)
+    seed.add_argument("--locations", type=int, default=300)
+    seed.add_argument("--no-embeddings", action="store_true")
+    seed.add_argument("--skip-graph-stages", action="store_true",
+                      help="Jangan jalankan stage ETL (location, similar, summary): ukur jalur fallback live")
+    seed.add_argument("--yes-wipe", action="store_true", help="Konfirmasi: isi DB target akan dihapus")
+
+    run = sub.add_parser("run")
+    run.add_argument("--base-url", help="Tembak server yang sudah jalan, bukan app in-process")
+    run.add_argument("--replay", help="File hasil `record`: pakai driver palsu (tanpa DB)")
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--duration", type=float, default=20)
+    run.add_argument("--warmup", type=float, default=3)
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--no-cache", action="store_true")
+    run.add_argument("--out", help="Simpan hasil sebagai JSON")
+
+    record = sub.add_parser("record")
+    record.add_argument("--out", required=True)
+
+    cmp_ = sub.add_parser("compare")
+    cmp_.add_argument("old")
+    cmp_.add_argument("new")
+
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        from app.db import uri, username, password
+        host = urlparse(uri).hostname
+        if not args.yes_wipe or host not in ("localhost", "127.0.0.1"):
+            raise SystemExit("Seed cuma untuk Neo4j lokal (NEO4J_URI=bolt://localhost:...) dan butuh --yes-wipe.")
+        seed_graph(uri, (username, password), args.artists, args.artworks, args.periods,
+                   args.locations, not args.no_embeddings, run_graph_stages=not args.skip_graph_stages)
+    elif args.command == "run":
+        if args.no_cache:
+            # Harus di-set sebelum app.cache di-import
+            os.environ["ENTITY_CACHE_SIZE"] = "0"
+            os.environ["SEARCH_CACHE_SIZE"] = "0"
+        result = asyncio.run(run_benchmark(args))
+        print(json.dumps(result, indent=2))
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+    elif args.command == "record":
+        asyncio.run(record_responses(args.out))
+    else:
+        compare(args.old, args.new)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Export untuk initial load offline pakai `neo4j-admin database import`.
+
+Untuk cold load, UNWIND ... MERGE per 1000 baris jauh lebih lambat dari
+bulk importer. Mode ini mengubah cleaned_*.csv (+ embedding MiniLM) jadi
+CSV node/relasi dengan header format neo4j-admin:
+
+    <dir>/artists.csv        Artist   (key: original_name)
+    <dir>/artworks.csv       Artwork  (key: id, embedding float[])
+    <dir>/created_by.csv     (:Artwork)-[:CREATED_BY]->(:Artist)
+    <dir>/graph_meta.csv     GraphMeta (data version DB lama + 1)
+    <dir>/followup.cypher    constraint & index dari create_indexes() + bump GraphMeta
+
+--overwrite-destination ikut menghapus node GraphMeta. Versinya dibawa
+lewat graph_meta.csv dan followup.cypher (max(versi DB lama) + 1), supaya
+worker API yang masih memegang versi lama tetap melihat versi berubah
+(cache / ETag tidak basi dan tidak bentrok dengan ETag lama).
+
+Id di-resolve di sini: CREATED_BY yang artist-nya tidak ada di
+cleaned_info.csv dilaporkan sebagai dangling dan tidak ditulis (sama
+seperti MATCH yang gagal di import_artworks).
+
+    python etl_pipeline.py --export-admin-import import_data
+"""
+import csv
+import os
+import time
+from csv_stream import read_csv_batches, ByteProgress
+from graph_meta import bump_version_statement
+
+ARRAY_DELIMITER = ";"
+
+ARTIST_HEADER = [
+    "original_name:ID(Artist)", ":LABEL", "period", "school", "nationality", "base_location",
+    "source_url", "birth_year:long", "death_year:long", "bio", "wikipedia",
+]
+ARTWORK_HEADER = [
+    ":ID(Artwork)", ":LABEL", "id:long", "title", "image_url", "file_info", "year_created",
+    "medium", "dimensions", "location", "raw_metadata", "embedding:float[]",
+]
+CREATED_BY_HEADER = [":START_ID(Artwork)", ":END_ID(Artist)", ":TYPE"]
+GRAPH_META_HEADER = [":ID(GraphMeta)", ":LABEL", "key", "data_version:long", "updated_by"]
+
+
+def to_int(value):
+    # Sama dengan toInteger() di Cypher: yang tidak bisa di-parse jadi kosong (null)
+    try:
+        return str(int(float(value)))
+    except (TypeError, ValueError, OverflowError):
+        return ""
+
+
+def load_artists(info_csv, vip_csv):
+    """Gabung base info + VIP seperti import_base_info lalu enrich_vip_artists."""
+    artists = {}
+    for batch, _ in read_csv_batches(info_csv):
+        for row in batch:
+            # MERGE + SET: baris terakhir dengan nama yang sama yang menang
+            artists[row["clean_name"]] = {
+                "period": row.get("period"),
+                "school": row.get("school"),
+                "nationality": row.get("nationality"),
+                "base_location": row.get("base"),
+                "source_url": row.get("url"),
+                "birth_year": to_int(row.get("birth_year_clean")),
+                "death_year": to_int(row.get("death_year_clean")),
+                "bio": "",
+                "wikipedia": "",
+            }
+    if os.path.exists(vip_csv):
+        for batch, _ in read_csv_batches(vip_csv):
+            for row in batch:
+                artist = artists.get(row["clean_name"])
+                if artist is None:
+                    continue  # enrich pakai MATCH, artist yang tidak ada di-skip
+                artist["bio"] = row.get("bio")
+                artist["wikipedia"] = row.get("wikipedia")
+                artist["birth_year"] = artist["birth_year"] or to_int(row.get("birth_year_clean"))
+                artist["death_year"] = artist["death_year"] or to_int(row.get("death_year_clean"))
+    return artists
+
+
+def export_admin_import(out_dir, info_csv, vip_csv, artworks_csv, embed_batches, followup_statements,
+                        data_version=None, batch_size=1000, dangling_sample=20):
+    """`data_version` = versi GraphMeta DB sebelum di-overwrite (None = tidak terbaca)."""
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"📦 Export format neo4j-admin ke {out_dir}/ ...")
+
+    artists = load_artists(info_csv, vip_csv)
+    with open(os.path.join(out_dir, "artists.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(ARTIST_HEADER)
+        for name, a in artists.items():
+            writer.writerow([
+                name, "Artist", a["period"], a["school"], a["nationality"], a["base_location"],
+                a["source_url"], a["birth_year"], a["death_year"], a["bio"], a["wikipedia"],
+            ])
+    print(f"   ✅ {len(artists)} Artists")
+
+    seen_ids = set()
+    duplicates = 0
+    dangling = {}
+    rel_count = 0
+    progress = ByteProgress(artworks_csv, label="Artworks")
+    with open(os.path.join(out_dir, "artworks.csv"), "w", encoding="utf-8", newline="") as nodes_f, \
+            open(os.path.join(out_dir, "created_by.csv"), "w", encoding="utf-8", newline="") as rels_f:
+        nodes = csv.writer(nodes_f)
+        rels = csv.writer(rels_f)
+        nodes.writerow(ARTWORK_HEADER)
+        rels.writerow(CREATED_BY_HEADER)
+        # Embedding tetap streaming per batch (pakai cache embedding kalau aktif)
+        for batch, offset in embed_batches(read_csv_batches(artworks_csv, batch_size)):
+            for row in batch:
+                art_id = to_int(row["ID"])
+                if not art_id or art_id in seen_ids:
+                    # neo4j-admin menolak id ganda, jadi baris pertama yang dipakai
+                    duplicates += 1
+                    continue
+                seen_ids.add(art_id)
+                nodes.writerow([
+                    art_id, "Artwork", art_id, row.get("title"), row.get("clean_url"), row.get("file info"),
+                    row.get("clean_year"), row.get("clean_medium"), row.get("clean_dimensions"),
+                    row.get("clean_location"), row.get("picture data"),
+                    ARRAY_DELIMITER.join(repr(x) for x in row["embedding"]),
+                ])
+                artist = row.get("clean_artist_name")
+                if artist in artists:
+                    rels.writerow([art_id, artist, "CREATED_BY"])
+                    rel_count += 1
+                else:
+                    dangling[artist] = dangling.get(artist, 0) + 1
+            progress.update(offset, len(batch))
+    print(f"\n   ✅ {len(seen_ids)} Artworks, {rel_count} CREATED_BY ({duplicates} baris id kosong/ganda dilewati)")
+
+    if dangling:
+        print(f"   ⚠️ {sum(dangling.values())} artwork menunjuk {len(dangling)} artist yang tidak ada di {info_csv}:")
+        for name, count in sorted(dangling.items(), key=lambda item: -item[1])[:dangling_sample]:
+            print(f"      - {name!r}: {count} karya")
+
+    if data_version is None:
+        # Versi lama tidak diketahui: pakai detik epoch, pasti di atas counter versi mana pun
+        data_version = int(time.time())
+        print(f"   ⚠️ Data version DB lama tidak terbaca, GraphMeta dipulihkan dari floor {data_version}")
+    # GraphMeta ikut di-import, jadi begitu DB hidup lagi versinya sudah lebih besar
+    with open(os.path.join(out_dir, "graph_meta.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(GRAPH_META_HEADER)
+        writer.writerow(["graph", "GraphMeta", "graph", data_version + 1, "admin_import"])
+    followup_statements = list(followup_statements) + [bump_version_statement(data_version, "admin_import")]
+    with open(os.path.join(out_dir, "followup.cypher"), "w", encoding="utf-8") as f:
+        for statement in followup_statements:
+            f.write(" ".join(statement.split()) + ";\n")
+
+    print("\n👉 Langkah berikutnya (DB target harus berhenti dulu):")
+    print(f"   neo4j-admin database import full neo4j --overwrite-destination "
+          f"--array-delimiter=\"{ARRAY_DELIMITER}\" --multiline-fields=true "
+          f"--nodes={out_dir}/artists.csv --nodes={out_dir}/artworks.csv --nodes={out_dir}/graph_meta.csv "
+          f"--relationships={out_dir}/created_by.csv")
+    print(f"   cypher-shell -f {out_dir}/followup.cypher")
+    print("   python etl_pipeline.py --after-admin-import")
+
+    return {
+        "artists": len(artists),
+        "artworks": len(seen_ids),
+        "created_by": rel_count,
+        "duplicate_artworks": duplicates,
+        "dangling_artists": dangling,
+        "previous_data_version": data_version,
+    }
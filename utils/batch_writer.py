@@ -0,0 +1,230 @@
+"""
+Batch writer bersama untuk semua stage ETL & worker Wikidata.
+
+- Tiap batch ditulis di managed transaction (session.execute_write), jadi
+  error transient (deadlock, leader berganti, koneksi putus) di-retry
+  otomatis oleh driver, bukan menggagalkan seluruh run.
+- ETL_WRITERS session jalan paralel, masing-masing di thread sendiri.
+- Baris dengan partition key yang sama (misal nama Artist) selalu masuk ke
+  writer yang sama dan ditulis berurutan, jadi dua transaksi paralel tidak
+  pernah MERGE node Artist yang sama (sumber deadlock).
+- Batch size adaptif: membesar kalau transaksi cepat, mengecil kalau lebih
+  lama dari ETL_TARGET_TX_SECONDS. Kalau transaksi kena error memori, batch
+  dibelah dua lalu diulang.
+"""
+import os
+import queue
+import threading
+import time
+import zlib
+from neo4j.exceptions import Neo4jError
+
+ETL_WRITERS = int(os.getenv("ETL_WRITERS", "1"))
+# Jumlah batch yang boleh antre per writer (producer, misal encode MiniLM, jalan duluan)
+ETL_QUEUE_DEPTH = int(os.getenv("ETL_QUEUE_DEPTH", "2"))
+ETL_BATCH_SIZE = int(os.getenv("ETL_BATCH_SIZE", "1000"))
+ETL_MIN_BATCH_SIZE = int(os.getenv("ETL_MIN_BATCH_SIZE", "50"))
+ETL_MAX_BATCH_SIZE = int(os.getenv("ETL_MAX_BATCH_SIZE", "10000"))
+ETL_TARGET_TX_SECONDS = float(os.getenv("ETL_TARGET_TX_SECONDS", "2"))
+
+
+class BatchTooLarge(Exception):
+    pass
+
+
+def is_memory_error(error):
+    code = getattr(error, "code", None) or ""
+    return "Memory" in code or "OutOfMemory" in str(error)
+
+
+def partition_of(key, partitions):
+    # crc32, bukan hash(): stabil antar proses
+    return zlib.crc32(str(key).encode("utf-8")) % partitions
+
+
+class BatchWriter:
+    def __init__(self, driver, writers=ETL_WRITERS, batch_size=ETL_BATCH_SIZE, queue_depth=ETL_QUEUE_DEPTH,
+                 min_batch_size=ETL_MIN_BATCH_SIZE, max_batch_size=ETL_MAX_BATCH_SIZE,
+                 target_seconds=ETL_TARGET_TX_SECONDS):
+        self.driver = driver
+        self.writers = max(1, writers)
+        self.batch_size = batch_size
+        self.queue_depth = queue_depth
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_seconds = target_seconds
+        self.splits = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _run(tx, query, rows, params):
+        try:
+            tx.run(query, batch=rows, **params).consume()
+        except Neo4jError as e:
+            if is_memory_error(e):
+                # Bukan error retryable buat driver: kita yang belah batch-nya
+                raise BatchTooLarge(str(e)) from e
+            raise
+
+    def _adapt(self, rows, elapsed):
+        with self._lock:
+            # Batch sisa (lebih kecil dari setengah ukuran sekarang) tidak representatif
+            if rows < self.batch_size // 2 or elapsed <= 0:
+                return
+            scale = min(max(self.target_seconds / elapsed, 0.5), 1.5)
+            self.batch_size = int(min(max(self.batch_size * scale, self.min_batch_size), self.max_batch_size))
+
+    def _write(self, session, query, rows, params):
+        start = time.perf_counter()
+        try:
+            session.execute_write(self._run, query, rows, params)
+        except BatchTooLarge:
+            if len(rows) <= 1:
+                raise
+            mid = len(rows) // 2
+            with self._lock:
+                self.splits += 1
+                # Jangan tumbuh lagi sampai ukuran yang barusan kena limit
+                self.max_batch_size = max(self.min_batch_size, min(self.max_batch_size, mid))
+                self.batch_size = min(self.batch_size, self.max_batch_size)
+            print(f"\n   ⚠️ Batch {len(rows)} baris kena limit memori, dibelah jadi {mid} + {len(rows) - mid}")
+            return self._write(session, query, rows[:mid], params) + self._write(session, query, rows[mid:], params)
+        elapsed = time.perf_counter() - start
+        self._adapt(len(rows), elapsed)
+        return elapsed
+
+    def write(self, query, batches, partition_key=None, on_progress=None, **params):
+        """
+        Tulis semua baris dari `batches` (iterable of (rows, offset), misal
+        read_csv_batches) pakai `query` yang membaca `$batch`.
+
+        Input dibaca di thread pemanggil (misal baca CSV + encode MiniLM)
+        sementara writer thread menulis batch sebelumnya. Return statistik
+        waktu untuk overlap_report.
+        """
+        queues = [queue.Queue(maxsize=self.queue_depth) for _ in range(self.writers)]
+        buffers = [[] for _ in range(self.writers)]
+        errors = []
+        # write_s = wall-clock saat minimal satu writer sedang menulis (buat
+        # overlap_report); tx_s = jumlah durasi transaksi semua writer
+        stats = {"rows": 0, "batches": 0, "write_s": 0.0, "tx_s": 0.0, "produce_s": 0.0, "blocked_s": 0.0}
+        busy = {"active": 0, "since": 0.0}
+
+        def mark_busy(delta):
+            with self._lock:
+                now = time.perf_counter()
+                if busy["active"] == 0:
+                    busy["since"] = now
+                busy["active"] += delta
+                if busy["active"] == 0:
+                    stats["write_s"] += now - busy["since"]
+
+        def worker(pending):
+            with self.driver.session() as session:
+                while True:
+                    item = pending.get()
+                    if item is None:
+                        return
+                    if errors:
+                        continue  # Sudah ada yang gagal: kuras queue saja
+                    rows, offset = item
+                    mark_busy(1)
+                    try:
+                        elapsed = self._write(session, query, rows, params)
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    finally:
+                        mark_busy(-1)
+                    with self._lock:
+                        stats["rows"] += len(rows)
+                        stats["batches"] += 1
+                        stats["tx_s"] += elapsed
+                        if on_progress is not None:
+                            on_progress(offset, len(rows))
+
+        next_queue = 0
+
+        def flush(i, offset, final=False):
+            nonlocal next_queue
+            while buffers[i] and (final or len(buffers[i]) >= self.batch_size):
+                rows, buffers[i] = buffers[i][:self.batch_size], buffers[i][self.batch_size:]
+                if partition_key is None:
+                    # Tanpa partisi: bagi rata round-robin
+                    target, next_queue = next_queue, (next_queue + 1) % self.writers
+                else:
+                    target = i
+                start = time.perf_counter()
+                queues[target].put((rows, offset))  # blok kalau writer ketinggalan
+                stats["blocked_s"] += time.perf_counter() - start
+
+        threads = [threading.Thread(target=worker, args=(q,), daemon=True) for q in queues]
+        for t in threads:
+            t.start()
+        wall_start = time.perf_counter()
+        offset = None
+        try:
+            batches = iter(batches)
+            while not errors:
+                start = time.perf_counter()
+                item = next(batches, None)
+                stats["produce_s"] += time.perf_counter() - start
+                if item is None:
+                    break
+                rows, offset = item
+                if partition_key is None:
+                    buffers[0].extend(rows)
+                else:
+                    for row in rows:
+                        buffers[partition_of(partition_key(row), self.writers)].append(row)
+                for i in range(self.writers):
+                    flush(i, offset)
+            if not errors:
+                for i in range(self.writers):
+                    flush(i, offset, final=True)
+        finally:
+            for q in queues:
+                q.put(None)
+            for t in threads:
+                t.join()
+        if errors:
+            raise errors[0]
+
+        stats["wall_s"] = time.perf_counter() - wall_start
+        stats["batch_size"] = self.batch_size
+        return stats
+
+    def write_rows(self, query, rows, partition_key=None, **params):
+        """Untuk list kecil yang sudah di memori (misal hasil satu batch Wikidata)."""
+        if not rows:
+            return None
+        if len(rows) <= self.batch_size:
+            # Cukup satu transaksi di thread ini, tanpa spin up writer thread
+            with self.driver.session() as session:
+                self._write(session, query, rows, params)
+            return None
+        return self.write(query, [(rows, None)], partition_key=partition_key, **params)
+
+
+class WriterPool:
+    """
+    Satu BatchWriter per stage / query: batch size yang dipelajari dari MERGE
+    artwork tidak ikut dipakai query vector SIMILAR_TO, dan sebaliknya.
+    """
+
+    def __init__(self, driver, **defaults):
+        self.driver = driver
+        self.defaults = defaults
+        self._writers = {}
+
+    def get(self, stage, **overrides):
+        writer = self._writers.get(stage)
+        if writer is None:
+            writer = self._writers[stage] = BatchWriter(self.driver, **self.defaults)
+        for name, value in overrides.items():
+            if value is not None:
+                setattr(writer, name, max(1, value) if name == "writers" else value)
+        return writer
+
+    def __getitem__(self, stage):
+        return self.get(stage)
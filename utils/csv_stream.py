@@ -0,0 +1,72 @@
+"""
+Baca CSV hasil data_clean.py secara streaming untuk ETL.
+
+File dibuka binary lalu di-decode per baris sebelum masuk csv.DictReader,
+jadi offset byte yang sudah dibaca selalu diketahui. Progress & ETA
+dihitung dari offset itu (bukan dari jumlah baris yang harus di-load
+duluan), dan yang ada di memori paling banyak satu batch.
+"""
+import csv
+import os
+import time
+from itertools import islice
+
+
+class ByteCountingLines:
+    """Iterator baris (str) di atas file binary, sambil mencatat byte yang sudah dibaca."""
+
+    def __init__(self, f, encoding="utf-8"):
+        self.f = f
+        self.encoding = encoding
+        self.offset = 0
+
+    def __iter__(self):
+        for raw in self.f:
+            self.offset += len(raw)
+            yield raw.decode(self.encoding)
+
+
+def read_csv_batches(csv_file, batch_size=1000):
+    """Yield (batch list of dict, offset byte setelah batch itu)."""
+    with open(csv_file, "rb") as f:
+        lines = ByteCountingLines(f)
+        reader = csv.DictReader(lines)
+        while True:
+            batch = list(islice(reader, batch_size))
+            if not batch:
+                return
+            yield batch, lines.offset
+
+
+def filter_batches(batches, row_filter=None):
+    """Saring baris tiap batch (misal cuma yang berubah, lihat etl_delta.py)."""
+    for batch, offset in batches:
+        if row_filter is not None:
+            batch = [row for row in batch if row_filter(row)]
+        if batch:
+            yield batch, offset
+
+
+class ByteProgress:
+    """Progress + ETA berdasarkan posisi byte di file input."""
+
+    def __init__(self, csv_file, label="Progress"):
+        self.total_bytes = os.path.getsize(csv_file) or 1
+        self.label = label
+        self.rows = 0
+        self.offset = 0
+        self.start_time = time.time()
+
+    def update(self, offset, rows):
+        self.rows += rows
+        # Writer paralel bisa selesai tidak urut, pakai offset terjauh
+        self.offset = max(self.offset, offset)
+        elapsed = time.time() - self.start_time
+        done = min(self.offset / self.total_bytes, 1.0)
+        eta = elapsed * (1 - done) / done if done > 0 else 0
+        print(f"   ⏳ {self.label}: {self.rows} baris "
+              f"({done * 100:.1f}%) | "
+              f"Sisa: {eta:.0f}s", end='\r')
+
+    def elapsed(self):
+        return time.time() - self.start_time
@@ -15,6 +15,11 @@ OUTPUT_FILES = {
     "artworks": "cleaned_artworks.csv"
 }
 
+# Pemisah antar bagian lokasi di kolom clean_location ("Museum X, Paris").
+# Dipakai juga oleh graph_stages.link_artwork_locations untuk resolve ke node Location.
+LOCATION_SEPARATOR = ", "
+UNKNOWN_LOCATION = "Unknown Location"
+
 MEDIUM_KEYWORDS = [
     "oil", "canvas", "panel", "wood", "tempera", "fresco", "paper", 
     "bronze", "marble", "copper", "gold", "silver", "sketch", "drawing",
@@ -71,7 +76,7 @@ def smart_parse_metadata(raw_text):
             "year_created": "Unknown Year", 
             "medium": "Unknown Medium", 
             "dimensions": "Unknown Dimensions", 
-            "location": "Unknown Location"
+            "location": UNKNOWN_LOCATION
         }
 
     parts = [p.strip() for p in raw_text.split(',')]
@@ -104,7 +109,7 @@ def smart_parse_metadata(raw_text):
             remaining_parts.append(part)
 
     valid_locations = [p for p in remaining_parts if len(p) > 2 and not p.isdigit()]
-    final_location = ", ".join(valid_locations) if valid_locations else "Unknown Location"
+    final_location = LOCATION_SEPARATOR.join(valid_locations) if valid_locations else UNKNOWN_LOCATION
 
     return {
         "year_created": found_year if found_year else "Unknown Year",
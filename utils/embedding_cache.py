@@ -0,0 +1,133 @@
+"""
+Cache embedding di disk, content-addressed: key = sha1(nama model + teks).
+
+Re-import tanpa perubahan teks tidak perlu encode MiniLM lagi; yang di-encode
+cuma teks yang belum pernah dilihat (miss), sekaligus satu batch.
+
+Isi folder cache = segment append-only:
+    <dir>/seg-00001/keys.npy      -> uint8 [n, 20], digest sha1 per baris
+    <dir>/seg-00001/vectors.npy   -> float32 [n, dim], dibuka mmap_mode='r'
+    <dir>/seg-00002/...
+
+Entry baru ditampung di memori dan ditulis sebagai segment baru tiap
+`flush_every` miss (env EMBEDDING_CACHE_FLUSH_EVERY) dan saat save(), jadi
+cold import tidak menahan semua embedding di RAM. Segment ditulis ke folder
+.tmp lalu di-rename utuh, jadi keys & vectors tidak pernah beda versi.
+"""
+import hashlib
+import os
+import shutil
+import numpy as np
+
+EMBEDDING_CACHE_FLUSH_EVERY = int(os.getenv("EMBEDDING_CACHE_FLUSH_EVERY", "10000"))
+
+# Penanda entry yang belum di-flush (masih di self._new)
+IN_MEMORY = -1
+
+
+class EmbeddingCache:
+    def __init__(self, path, model_name, flush_every=EMBEDDING_CACHE_FLUSH_EVERY):
+        self.path = path
+        self.model_name = model_name
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._rows = {}  # key -> (segment, row)
+        self._segments = []
+        self._next_segment = 1
+        self._new_keys = []
+        self._new = []
+        self._load()
+
+    def _load(self):
+        if not os.path.isdir(self.path):
+            return
+        for name in sorted(os.listdir(self.path)):
+            if not name.startswith("seg-") or name.endswith(".tmp"):
+                continue
+            self._next_segment = max(self._next_segment, int(name[4:]) + 1)
+            seg_dir = os.path.join(self.path, name)
+            try:
+                keys = np.load(os.path.join(seg_dir, "keys.npy"))
+                vectors = np.load(os.path.join(seg_dir, "vectors.npy"), mmap_mode="r")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Segment cache {name} dilewati: {e}")
+                continue
+            if len(keys) != len(vectors):
+                print(f"⚠️ Segment cache {name} dilewati: {len(keys)} key vs {len(vectors)} vektor")
+                continue
+            self._add_segment(keys, vectors)
+
+    def _add_segment(self, keys, vectors):
+        segment = len(self._segments)
+        self._segments.append(vectors)
+        for row, k in enumerate(keys):
+            self._rows[k.tobytes()] = (segment, row)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def key(self, text):
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    def _get(self, key):
+        location = self._rows.get(key)
+        if location is None:
+            return None
+        segment, row = location
+        if segment == IN_MEMORY:
+            return self._new[row]
+        return np.asarray(self._segments[segment][row])
+
+    def encode(self, texts, encode_fn):
+        """Sama seperti encode_fn(texts), tapi yang sudah ada di cache tidak di-encode ulang."""
+        result = [None] * len(texts)
+        missing = {}
+        for pos, text in enumerate(texts):
+            key = self.key(text)
+            vector = self._get(key)
+            if vector is None:
+                # Teks kembar dalam satu batch cukup di-encode sekali
+                missing.setdefault(key, []).append(pos)
+            else:
+                result[pos] = vector
+        misses = sum(len(positions) for positions in missing.values())
+        self.hits += len(texts) - misses
+        self.misses += misses
+
+        if missing:
+            vectors = np.asarray(encode_fn([texts[positions[0]] for positions in missing.values()]), dtype=np.float32)
+            for (key, positions), vector in zip(missing.items(), vectors):
+                self._rows[key] = (IN_MEMORY, len(self._new))
+                self._new_keys.append(key)
+                self._new.append(vector)
+                for pos in positions:
+                    result[pos] = vector
+        output = np.stack(result) if result else np.zeros((0, 0), dtype=np.float32)
+        if len(self._new) >= self.flush_every:
+            self.save()
+        return output
+
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def save(self):
+        if not self._new:
+            return
+        name = f"seg-{self._next_segment:05d}"
+        final_dir = os.path.join(self.path, name)
+        tmp_dir = f"{final_dir}.tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)  # sisa crash sebelumnya
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, "keys.npy"), np.frombuffer(b"".join(self._new_keys), dtype=np.uint8).reshape(-1, 20))
+        np.save(os.path.join(tmp_dir, "vectors.npy"), np.stack(self._new))
+        os.replace(tmp_dir, final_dir)
+        self._next_segment += 1
+
+        # Entry yang barusan ditulis sekarang dibaca dari mmap, bukan RAM
+        keys = np.load(os.path.join(final_dir, "keys.npy"))
+        self._add_segment(keys, np.load(os.path.join(final_dir, "vectors.npy"), mmap_mode="r"))
+        self._new_keys = []
+        self._new = []
@@ -0,0 +1,97 @@
+"""
+State untuk ETL incremental (delta), dipakai `python etl_pipeline.py --delta`.
+
+Tiap baris CSV hasil data_clean.py di-fingerprint (sha1 dari semua kolomnya).
+Fingerprint run terakhir disimpan di file state (env ETL_STATE_FILE), jadi run
+berikutnya cukup upsert baris yang baru / berubah dan menghapus yang sudah
+tidak ada, tanpa clear_database() + reload penuh.
+"""
+import hashlib
+import json
+import os
+
+
+def row_fingerprint(row):
+    payload = json.dumps(row, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class DeltaState:
+    def __init__(self, path, previous=None):
+        """`previous=None` = baca state lama dari `path`; `{}` = anggap semua baris baru (full load)."""
+        self.path = path
+        if previous is None:
+            previous = {}
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    previous = json.load(f)
+        self.previous = previous
+        self.current = {}
+        self.touched = {}
+        # Section yang CSV-nya sudah dibaca sampai habis
+        self.complete = set()
+
+    def changed(self, section, key_field, depends_on=None):
+        """
+        Row filter untuk stage ETL: catat fingerprint, True kalau barisnya baru / berubah.
+
+        `depends_on=(section, field)`: fingerprint baris ikut memuat fingerprint
+        baris section lain yang dirujuk (misal artwork -> artist lewat
+        clean_artist_name), jadi kalau artist-nya baru / berubah, baris ini
+        ikut ditulis ulang. Section yang dirujuk harus sudah dibaca duluan.
+        """
+        before = self.previous.get(section, {})
+        now = self.current.setdefault(section, {})
+        touched = self.touched.setdefault(section, [])
+        if depends_on is not None:
+            parent_section, parent_field = depends_on
+            parents = self.current.get(parent_section, {})
+
+        def row_filter(row):
+            key = row[key_field]
+            fingerprint = row_fingerprint(row)
+            if depends_on is not None:
+                fingerprint = row_fingerprint([fingerprint, parents.get(row.get(parent_field))])
+            now[key] = fingerprint
+            if before.get(key) == fingerprint:
+                return False
+            touched.append(key)
+            return True
+
+        return row_filter
+
+    def mark_complete(self, section):
+        """Panggil setelah stage section ini selesai membaca seluruh CSV-nya."""
+        self.complete.add(section)
+
+    def changed_keys(self, section):
+        return list(self.touched.get(section, []))
+
+    def removed(self, section):
+        # CSV yang tidak dibaca sampai habis (hilang / gagal di tengah) bukan
+        # berarti semua barisnya dihapus: jangan laporkan apa pun
+        if section not in self.complete:
+            return []
+        now = self.current.get(section, {})
+        return [key for key in self.previous.get(section, {}) if key not in now]
+
+    def summary(self, section):
+        before = self.previous.get(section, {})
+        touched = self.touched.get(section, [])
+        new = sum(1 for key in touched if key not in before)
+        return {
+            "new": new,
+            "changed": len(touched) - new,
+            "unchanged": len(self.current.get(section, {})) - len(touched),
+            "removed": len(self.removed(section)),
+        }
+
+    def save(self):
+        # Section yang tidak selesai dibaca tetap pakai fingerprint lama
+        state = {section: self.current[section] for section in self.complete if section in self.current}
+        for section, fingerprints in self.previous.items():
+            state.setdefault(section, fingerprints)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
@@ -1,9 +1,15 @@
+import argparse
 import os
-import csv
-import time
 from neo4j import GraphDatabase
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
+from graph_meta import bump_data_version, read_data_version
+from csv_stream import read_csv_batches, filter_batches, ByteProgress
+from etl_delta import DeltaState
+from embedding_cache import EmbeddingCache
+from batch_writer import WriterPool
+import graph_stages
+import admin_import
 
 # Load environment variables
 load_dotenv()
@@ -11,11 +17,35 @@ load_dotenv()
 URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 AUTH = (os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "password"))
 
+# Harus sama dengan EMBEDDING_MODEL di API (app/semantic.py)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Folder cache embedding on-disk (kosong = cache dimatikan, selalu encode ulang)
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+# Fingerprint baris run terakhir, dipakai mode --delta
+ETL_STATE_FILE = os.getenv("ETL_STATE_FILE", "etl_state.json")
+
+
+def overlap_report(encode_s, write_s, wall_s, blocked_s=0.0):
+    """Seberapa banyak encode (CPU) & tulis ke Neo4j (network) berjalan bersamaan."""
+    overlap = max(0.0, encode_s + write_s - wall_s)
+    shorter = min(encode_s, write_s)
+    return {
+        "encode_s": round(encode_s, 2),
+        "write_s": round(write_s, 2),
+        "wall_s": round(wall_s, 2),
+        "blocked_s": round(blocked_s, 2),
+        "overlap_s": round(overlap, 2),
+        "overlap_pct": round(min(overlap / shorter, 1.0) * 100, 1) if shorter else 0.0,
+    }
+
 class ArtGraphPipeline:
     def __init__(self):
         self.driver = GraphDatabase.driver(URI, auth=AUTH)
         print("🤖 Loading AI Model (MiniLM) untuk Embedding...")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.model = SentenceTransformer(EMBEDDING_MODEL)
+        self.embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_MODEL) if EMBEDDING_CACHE_DIR else None
+        # Satu BatchWriter per stage (ETL_WRITERS, ETL_TARGET_TX_SECONDS, dst. di batch_writer.py)
+        self.writers = WriterPool(self.driver)
 
     def close(self):
         self.driver.close()
@@ -23,8 +53,9 @@ class ArtGraphPipeline:
     def clear_database(self):
         print("🧹 Membersihkan database lama & Index yang nyangkut...")
         with self.driver.session() as session:
-            # 1. Hapus Data
-            session.run("MATCH (n) DETACH DELETE n")
+            # 1. Hapus Data (kecuali GraphMeta: data version harus terus naik,
+            #    kalau ikut terhapus versinya balik ke 1 dan ETag/cache lama valid lagi)
+            session.run("MATCH (n) WHERE NOT n:GraphMeta DETACH DELETE n")
             
             # 2. Hapus Constraint & Index secara paksa
             # Kita ambil daftar constraint dulu, lalu drop satu-satu
@@ -40,32 +71,55 @@ class ArtGraphPipeline:
                     print(f"   - Dropping index: {rec['name']}")
                     session.run(f"DROP INDEX {rec['name']} IF EXISTS")
 
+    # Urutan penting: constraint DULUAN sebelum index lain biar gak konflik.
+    # Dipakai juga oleh export neo4j-admin (followup.cypher)
+    INDEX_STATEMENTS = [
+        "CREATE CONSTRAINT artist_uniq IF NOT EXISTS FOR (a:Artist) REQUIRE a.original_name IS UNIQUE",
+        "CREATE CONSTRAINT artwork_uniq IF NOT EXISTS FOR (a:Artwork) REQUIRE a.id IS UNIQUE",
+        # Location dibuat worker Wikidata (MERGE by name), index untuk resolve LOCATED_IN
+        "CREATE INDEX location_name IF NOT EXISTS FOR (l:Location) ON (l.name)",
+        # Baru buat Vector Index
+        """
+        CREATE VECTOR INDEX art_embeddings_index IF NOT EXISTS
+        FOR (n:Artwork) ON (n.embedding)
+        OPTIONS {indexConfig: {
+         `vector.dimensions`: 384,
+         `vector.similarity_function`: 'cosine'
+        }}
+        """,
+        # Terakhir buat Fulltext Search Index
+        # (Pastikan index sebelumnya udah beres, biasanya aman kalau constraint udah jadi)
+        """
+        CREATE FULLTEXT INDEX search_art IF NOT EXISTS
+        FOR (n:Artwork|Artist) 
+        ON EACH [n.title, n.original_name, n.nationality, n.period]
+        """,
+    ]
+
     def create_indexes(self):
         print("⚙️ Membuat Index Pencarian & Vector...")
         with self.driver.session() as session:
-            # Constraint harus dibuat DULUAN sebelum index lain biar gak konflik
-            session.run("CREATE CONSTRAINT artist_uniq IF NOT EXISTS FOR (a:Artist) REQUIRE a.original_name IS UNIQUE")
-            session.run("CREATE CONSTRAINT artwork_uniq IF NOT EXISTS FOR (a:Artwork) REQUIRE a.id IS UNIQUE")
-            
-            # Baru buat Vector Index
-            session.run("""
-                CREATE VECTOR INDEX art_embeddings_index IF NOT EXISTS
-                FOR (n:Artwork) ON (n.embedding)
-                OPTIONS {indexConfig: {
-                 `vector.dimensions`: 384,
-                 `vector.similarity_function`: 'cosine'
-                }}
-            """)
-            
-            # Terakhir buat Fulltext Search Index
-            # (Pastikan index sebelumnya udah beres, biasanya aman kalau constraint udah jadi)
-            session.run("""
-                CREATE FULLTEXT INDEX search_art IF NOT EXISTS
-                FOR (n:Artwork|Artist) 
-                ON EACH [n.title, n.original_name, n.nationality, n.period]
-            """)
-
-    def import_base_info(self, csv_file):
+            for statement in self.INDEX_STATEMENTS:
+                session.run(statement)
+
+    def export_admin_import(self, out_dir, info_csv="cleaned_info.csv", vip_csv="cleaned_artists.csv",
+                            artworks_csv="cleaned_artworks.csv"):
+        try:
+            # Versi GraphMeta sekarang ikut di-export: import --overwrite-destination menghapusnya
+            data_version = read_data_version(self.driver)
+        except Exception as e:
+            print(f"⚠️ Gagal membaca data version dari Neo4j: {e}")
+            data_version = None
+        try:
+            return admin_import.export_admin_import(
+                out_dir, info_csv, vip_csv, artworks_csv, self.embed_batches, self.INDEX_STATEMENTS,
+                data_version=data_version,
+            )
+        finally:
+            if self.embedding_cache is not None:
+                self.embedding_cache.save()
+
+    def import_base_info(self, csv_file, row_filter=None, required=False):
         print(f"📂 Mengimport Base Info dari {csv_file}...")
         
         # PENTING: Pakai 'row.clean_name' hasil normalisasi
@@ -80,9 +134,10 @@ class ArtGraphPipeline:
             a.birth_year = toInteger(row.birth_year_clean),
             a.death_year = toInteger(row.death_year_clean)
         """
-        self._run_batch_query(query, csv_file)
+        return self._run_batch_query("artists", query, csv_file, row_filter=row_filter,
+                                     partition_key=lambda row: row["clean_name"], required=required)
 
-    def enrich_vip_artists(self, csv_file):
+    def enrich_vip_artists(self, csv_file, row_filter=None, required=False):
         print(f"✨ Memperkaya VIP Artists dari {csv_file}...")
         
         # PENTING: Pakai 'row.clean_name'
@@ -94,105 +149,243 @@ class ArtGraphPipeline:
             a.birth_year = coalesce(a.birth_year, toInteger(row.birth_year_clean)),
             a.death_year = coalesce(a.death_year, toInteger(row.death_year_clean))
         """
-        self._run_batch_query(query, csv_file)
+        return self._run_batch_query("vip_artists", query, csv_file, row_filter=row_filter,
+                                     partition_key=lambda row: row["clean_name"], required=required)
+
+    ARTWORK_QUERY = """
+    UNWIND $batch AS row
+    
+    MERGE (art:Artwork {id: toInteger(row.ID)})
+    SET art.title = row.title,
+        art.image_url = row.clean_url,
+        art.file_info = row.`file info`,
+        art.year_created = row.clean_year,
+        art.medium = row.clean_medium,
+        art.dimensions = row.clean_dimensions,
+        art.location = row.clean_location,
+        art.raw_metadata = row.`picture data`,
+        art.embedding = row.embedding 
+    
+    // Artist-nya bisa berubah di run delta: buang relasi ke artist lama
+    WITH art, row
+    OPTIONAL MATCH (art)-[old:CREATED_BY]->(prev:Artist)
+    WHERE prev.original_name <> row.clean_artist_name
+    DELETE old
+
+    WITH DISTINCT art, row
+    MATCH (a:Artist {original_name: row.clean_artist_name})
+    MERGE (art)-[:CREATED_BY]->(a)
+    """
+
+    @staticmethod
+    def artwork_text(row):
+        # Pakai nama bersih untuk embedding juga biar akurat
+        return f"{row['title']} by {row['clean_artist_name']}. {row['clean_medium']}. {row['clean_year']}."
+
+    def embed_batches(self, batches):
+        """Stage embed: tempel vektor MiniLM ke tiap baris, batch demi batch."""
+        for batch, offset in batches:
+            texts = [self.artwork_text(row) for row in batch]
+            if self.embedding_cache is not None:
+                # Cuma teks yang belum pernah di-encode (miss) yang masuk model
+                embeddings = self.embedding_cache.encode(texts, self.model.encode)
+            else:
+                embeddings = self.model.encode(texts)
+            for idx, row in enumerate(batch):
+                row['embedding'] = embeddings[idx].tolist()
+            yield batch, offset
 
-    def import_artworks(self, csv_file):
+    def import_artworks(self, csv_file, batch_size=1000, queue_depth=None, writers=None, row_filter=None,
+                        required=False):
         print(f"🖼️ Mengimport Artworks + Embeddings dari {csv_file}...")
-        
-        data = []
+        if not self._input_exists(csv_file, required):
+            return None
+
+        # Pipeline generator: baca -> chunk -> embed -> tulis. Thread utama
+        # meng-encode batch N+1 sementara writer thread menulis batch N.
+        # Dipartisi per artist: MERGE CREATED_BY ke Artist yang sama selalu
+        # lewat writer yang sama, jadi writer paralel tidak saling deadlock.
+        batches = self.embed_batches(filter_batches(read_csv_batches(csv_file, batch_size), row_filter))
+        progress = ByteProgress(csv_file)
+        # queue_depth / writers None = pakai ETL_QUEUE_DEPTH / ETL_WRITERS
+        writer = self.writers.get("artworks", queue_depth=queue_depth, writers=writers)
+        writers = writer.writers
+        print(f"   🚀 Memulai import artworks (streaming, batch awal {writer.batch_size}, "
+              f"queue {writer.queue_depth}, {writers} writer)...")
         try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                data = list(reader)
-        except FileNotFoundError:
-            print(f"❌ Error: File {csv_file} tidak ditemukan.")
-            return
+            stats = writer.write(self.ARTWORK_QUERY, batches, partition_key=lambda row: row["clean_artist_name"],
+                                      on_progress=progress.update)
+        finally:
+            if self.embedding_cache is not None:
+                # Simpan juga kalau import gagal di tengah, biar run berikutnya tidak encode ulang
+                self.embedding_cache.save()
 
-        total_rows = len(data)
-        batch_size = 1000 
-        start_time = time.time()
+        wall = progress.elapsed()
+        report = overlap_report(stats["produce_s"], stats["write_s"], wall, stats["blocked_s"])
+        report["batch_size"] = stats["batch_size"]
+        print(f"\n✅ Selesai import {progress.rows} Artworks dalam {wall:.2f} detik.")
+        report["write_tx_s"] = round(stats["tx_s"], 2)
+        print(f"   📊 Encode {report['encode_s']}s | tulis {report['write_s']}s "
+              f"({writers} writer, total transaksi {report['write_tx_s']}s) | "
+              f"wall {report['wall_s']}s -> overlap {report['overlap_s']}s "
+              f"({report['overlap_pct']}% dari stage terpendek) | encoder nunggu writer {report['blocked_s']}s")
+        print(f"   📦 {stats['batches']} transaksi, batch size akhir {stats['batch_size']} "
+              f"({writer.splits} kali dibelah karena limit memori)")
+        if self.embedding_cache is not None:
+            cache = self.embedding_cache
+            report["embedding_cache_hit_ratio"] = round(cache.hit_ratio(), 4)
+            print(f"   💾 Cache embedding: {cache.hits} hit / {cache.misses} miss "
+                  f"({cache.hit_ratio() * 100:.1f}% hit), {len(cache)} entry di {EMBEDDING_CACHE_DIR}")
+        return report
 
-        # PENTING: Artist di-match pakai 'row.clean_artist_name'
-        query = """
-        UNWIND $batch AS row
-        
-        MERGE (art:Artwork {id: toInteger(row.ID)})
-        SET art.title = row.title,
-            art.image_url = row.clean_url,
-            art.file_info = row.`file info`,
-            art.year_created = row.clean_year,
-            art.medium = row.clean_medium,
-            art.dimensions = row.clean_dimensions,
-            art.location = row.clean_location,
-            art.raw_metadata = row.`picture data`,
-            art.embedding = row.embedding 
-        
-        WITH art, row
-        MATCH (a:Artist {original_name: row.clean_artist_name})
-        MERGE (art)-[:CREATED_BY]->(a)
-        """
+    def compute_similar_artworks(self, top_k=5, ids=None):
+        # `ids=None` = semua Artwork; mode delta cuma kirim yang berubah
+        return graph_stages.compute_similar_artworks(self.driver, top_k=top_k, ids=ids,
+                                                     writer=self.writers["similar"])
 
-        print(f"   🚀 Memulai import {total_rows} artworks...")
+    def link_artwork_locations(self):
+        return graph_stages.link_artwork_locations(self.driver)
 
+    def refresh_movement_summaries(self):
+        return graph_stages.refresh_movement_summaries(self.driver)
+
+    def delete_removed(self, state, batch_size=1000):
+        """
+        Mode delta: hapus Artwork / Artist yang sudah tidak ada di CSV.
+        Return id Artwork yang tadinya menunjuk (SIMILAR_TO) ke karya yang
+        dihapus, supaya tetangganya dihitung ulang.
+        """
+        removed_artworks = [int(k) for k in state.removed("artworks")]
+        removed_artists = state.removed("artists")
+        affected = set()
         with self.driver.session() as session:
-            for i in range(0, total_rows, batch_size):
-                batch = data[i : i + batch_size]
-                
-                # --- EMBEDDING ---
-                texts_to_embed = []
-                for row in batch:
-                    # Pakai nama bersih untuk embedding juga biar akurat
-                    desc = f"{row['title']} by {row['clean_artist_name']}. {row['clean_medium']}. {row['clean_year']}."
-                    texts_to_embed.append(desc)
-                
-                embeddings = self.model.encode(texts_to_embed)
-                
-                for idx, row in enumerate(batch):
-                    row['embedding'] = embeddings[idx].tolist()
-                # ------------------
-
-                session.run(query, batch=batch)
-                
-                processed = min(i + batch_size, total_rows)
-                elapsed_time = time.time() - start_time
-                avg_time = elapsed_time / processed if processed > 0 else 0
-                est_remain = (total_rows - processed) * avg_time
-                
-                print(f"   ⏳ Progress: {processed}/{total_rows} "
-                      f"({(processed/total_rows)*100:.1f}%) | "
-                      f"Sisa: {est_remain:.0f}s", end='\r')
-
-        total_time = time.time() - start_time
-        print(f"\n✅ Selesai import {total_rows} Artworks dalam {total_time:.2f} detik.")
-
-    def _run_batch_query(self, query, csv_file, batch_size=1000):
-        data = []
-        try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                data = list(reader)
-        except FileNotFoundError:
-            print(f"❌ File {csv_file} not found.")
+            for i in range(0, len(removed_artworks), batch_size):
+                affected.update(r["id"] for r in session.run("""
+                    UNWIND $ids AS art_id
+                    MATCH (src:Artwork)-[:SIMILAR_TO]->(:Artwork {id: art_id})
+                    RETURN DISTINCT src.id AS id
+                """, ids=removed_artworks[i : i + batch_size]))
+        self.writers["delete_artworks"].write_rows("""
+            UNWIND $batch AS art_id
+            MATCH (a:Artwork {id: art_id})
+            DETACH DELETE a
+        """, removed_artworks)
+        self.writers["delete_artists"].write_rows("""
+            UNWIND $batch AS name
+            MATCH (a:Artist {original_name: name})
+            DETACH DELETE a
+        """, removed_artists)
+        print(f"🗑️ Dihapus: {len(removed_artworks)} Artworks, {len(removed_artists)} Artists.")
+        return sorted(affected - set(removed_artworks))
+
+    def reset_removed_vip(self, state, info_csv):
+        """
+        Mode delta: artist yang baris VIP-nya hilang dikembalikan ke kondisi
+        full reload (bio/wikipedia kosong, tahun lahir/wafat dari base info).
+        """
+        names = set(state.removed("vip_artists")) - set(state.removed("artists"))
+        if not names:
             return
+        self.writers["reset_vip"].write_rows("""
+            UNWIND $batch AS name
+            MATCH (a:Artist {original_name: name})
+            SET a.bio = null, a.wikipedia = null
+        """, sorted(names))
+        # Tahun dari VIP (coalesce) ikut dibuang: tulis ulang base info artist tersebut
+        self.import_base_info(info_csv, row_filter=lambda row: row["clean_name"] in names, required=True)
+        print(f"🧽 {len(names)} Artist dilepas dari data VIP.")
 
-        with self.driver.session() as session:
-            for i in range(0, len(data), batch_size):
-                batch = data[i : i + batch_size]
-                session.run(query, batch=batch)
-        
-        print(f"✅ Selesai memproses {len(data)} baris.")
+    @staticmethod
+    def _input_exists(csv_file, required):
+        if os.path.exists(csv_file):
+            return True
+        if required:
+            # Mode delta: CSV hilang jangan dianggap "semua baris dihapus"
+            raise FileNotFoundError(f"File {csv_file} tidak ditemukan (cwd: {os.getcwd()})")
+        print(f"❌ File {csv_file} not found.")
+        return False
+
+    def _run_batch_query(self, stage, query, csv_file, batch_size=1000, row_filter=None, partition_key=None,
+                         required=False):
+        """True kalau seluruh CSV selesai dibaca & ditulis."""
+        if not self._input_exists(csv_file, required):
+            return False
+
+        progress = ByteProgress(csv_file)
+        batches = filter_batches(read_csv_batches(csv_file, batch_size), row_filter)
+        self.writers[stage].write(query, batches, partition_key=partition_key, on_progress=progress.update)
+
+        print(f"\n✅ Selesai memproses {progress.rows} baris.")
+        return True
+
+    def bump_data_version(self):
+        # Kasih tahu API kalau data sudah berubah (cache lama jadi basi)
+        return bump_data_version(self.driver, source="etl")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETL CSV bersih -> Neo4j")
+    parser.add_argument("--delta", action="store_true",
+                        help="Cuma upsert baris baru/berubah & hapus yang hilang (tanpa clear_database)")
+    parser.add_argument("--export-admin-import", metavar="DIR",
+                        help="Tulis CSV node/relasi untuk neo4j-admin database import (tanpa menyentuh DB)")
+    parser.add_argument("--after-admin-import", action="store_true",
+                        help="Stage sisa (index, similar, location, summary) setelah neo4j-admin import")
+    args = parser.parse_args()
+
     pipeline = ArtGraphPipeline()
     try:
-        pipeline.clear_database() # 1. Hapus constraint lama
-        pipeline.create_indexes() # 2. Buat constraint baru yang bersih
-        
-        pipeline.import_base_info("cleaned_info.csv") 
-        pipeline.enrich_vip_artists("cleaned_artists.csv")
-        pipeline.import_artworks("cleaned_artworks.csv")
+        if args.export_admin_import:
+            # Cold load offline: cukup tulis file, DB belum disentuh
+            pipeline.export_admin_import(args.export_admin_import)
+        elif args.after_admin_import:
+            pipeline.create_indexes()
+            pipeline.compute_similar_artworks()
+            pipeline.link_artwork_locations()
+            pipeline.refresh_movement_summaries()
+            pipeline.bump_data_version()
+        else:
+            if args.delta:
+                # Index, constraint & properti hasil worker Wikidata tetap utuh
+                state = DeltaState(ETL_STATE_FILE)
+                pipeline.create_indexes() # IF NOT EXISTS, aman dijalankan ulang
+            else:
+                state = DeltaState(ETL_STATE_FILE, previous={})
+                pipeline.clear_database() # 1. Hapus constraint lama
+                pipeline.create_indexes() # 2. Buat constraint baru yang bersih
+            
+            # VIP & artwork ikut fingerprint artist-nya: artist baru / berubah
+            # memicu ulang enrich VIP (coalesce tahun) dan CREATED_BY karyanya
+            # Mode delta: input yang hilang = error, bukan section kosong.
+            # Removal cuma dihitung untuk section yang CSV-nya dibaca sampai habis.
+            required = args.delta
+            if pipeline.import_base_info("cleaned_info.csv", row_filter=state.changed("artists", "clean_name"),
+                                         required=required):
+                state.mark_complete("artists")
+            if pipeline.enrich_vip_artists("cleaned_artists.csv", row_filter=state.changed(
+                    "vip_artists", "clean_name", depends_on=("artists", "clean_name")), required=required):
+                state.mark_complete("vip_artists")
+            if pipeline.import_artworks("cleaned_artworks.csv", row_filter=state.changed(
+                    "artworks", "ID", depends_on=("artists", "clean_artist_name")), required=required):
+                state.mark_complete("artworks")
+
+            if args.delta:
+                for section in ("artists", "vip_artists", "artworks"):
+                    print(f"   Δ {section}: {state.summary(section)}")
+                affected = pipeline.delete_removed(state)
+                pipeline.reset_removed_vip(state, "cleaned_info.csv")
+                changed = sorted(set(int(k) for k in state.changed_keys("artworks")) | set(affected))
+                pipeline.compute_similar_artworks(ids=changed)
+            else:
+                pipeline.compute_similar_artworks()
+            pipeline.link_artwork_locations()
+            pipeline.refresh_movement_summaries()
+
+            pipeline.bump_data_version()
+            # State baru disimpan hanya kalau semua stage sukses
+            state.save()
         
     except Exception as e:
+        # state.save() di akhir try tidak tercapai: state lama tetap dipakai run berikutnya
         print(f"\n❌ Terjadi Error: {e}")
     finally:
-        pipeline.close()
\ No newline at end of file
+        pipeline.close()
@@ -0,0 +1,45 @@
+"""
+Helper bersama untuk "data version" graph.
+
+API (app/cache.py) menaruh versi ini di setiap cache key, jadi tiap kali
+ETL / worker Wikidata selesai nulis ke Neo4j, cukup panggil
+bump_data_version() dan semua cache di API otomatis dianggap basi
+tanpa perlu restart.
+
+Node GraphMeta tidak boleh ikut dihapus saat reset DB (clear_database),
+supaya versinya selalu naik dan tidak pernah dipakai ulang. Kalau DB diganti
+utuh (neo4j-admin import --overwrite-destination), versi lama dibawa lewat
+`floor` supaya versi baru tetap lebih besar dari yang dipegang worker API.
+"""
+
+# Versi baru = max(versi sekarang, floor) + 1
+BUMP_VERSION_QUERY = """
+MERGE (m:GraphMeta {key: 'graph'})
+SET m.data_version = CASE WHEN coalesce(m.data_version, 0) < $floor
+                          THEN $floor ELSE coalesce(m.data_version, 0) END + 1,
+    m.updated_at = datetime(),
+    m.updated_by = $source
+RETURN m.data_version AS version
+"""
+
+READ_VERSION_QUERY = "MATCH (m:GraphMeta {key: 'graph'}) RETURN m.data_version AS version"
+
+
+def read_data_version(driver):
+    with driver.session() as session:
+        record = session.run(READ_VERSION_QUERY).single()
+    return (record["version"] if record else None) or 0
+
+
+def bump_version_statement(floor, source):
+    """BUMP_VERSION_QUERY dengan nilai literal, untuk file .cypher (cypher-shell -f)."""
+    return (BUMP_VERSION_QUERY.replace("$floor", str(int(floor)))
+            .replace("$source", repr(str(source))))
+
+
+def bump_data_version(driver, source="etl", floor=0):
+    with driver.session() as session:
+        record = session.run(BUMP_VERSION_QUERY, source=source, floor=floor).single()
+    version = record["version"] if record else None
+    print(f"🔖 Data version graph sekarang: {version} (oleh {source})")
+    return version
@@ -0,0 +1,206 @@
+"""
+Stage "materialisasi" yang dijalankan setelah data ditulis ke Neo4j
+(ETL atau worker Wikidata), supaya endpoint API cukup traversal relasi /
+baca satu node, bukan scan label tiap request.
+
+Bisa juga dijalankan manual (misal setelah worker Wikidata bikin node
+Location / Period baru):
+    python graph_stages.py
+"""
+import os
+import time
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+from data_clean import LOCATION_SEPARATOR, UNKNOWN_LOCATION
+from graph_meta import bump_data_version
+from batch_writer import BatchWriter
+
+load_dotenv()
+
+URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+AUTH = (os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "password"))
+
+
+def link_artwork_locations(driver, batch_size=1000, location_names=None):
+    """
+    Resolve kolom clean_location (hasil smart_parse_metadata, disimpan di
+    Artwork.location) ke node Location yang sudah ada, lalu tulis relasi
+    (:Artwork)-[:LOCATED_IN]->(:Location).
+
+    clean_location = bagian-bagian lokasi yang digabung LOCATION_SEPARATOR,
+    jadi tiap bagian di-match persis ke Location.name (pakai index
+    location_name), bukan `CONTAINS` ke semua artwork.
+
+    `location_names` = cuma hubungkan Location yang barusan di-MERGE worker
+    Wikidata (node Location baru muncul setelah ETL, jadi stage penuh di ETL
+    tidak bisa menghubungkannya).
+    """
+    if location_names is not None:
+        return link_new_locations(driver, location_names)
+    print("📍 Menghubungkan Artwork -> Location (LOCATED_IN)...")
+    query = """
+    MATCH (art:Artwork)
+    WHERE art.location IS NOT NULL AND art.location <> $unknown
+    CALL {
+        WITH art
+        OPTIONAL MATCH (art)-[old:LOCATED_IN]->()
+        DELETE old
+        WITH DISTINCT art
+        UNWIND split(art.location, $sep) AS part
+        WITH art, trim(part) AS part
+        WHERE part <> ''
+        MATCH (l:Location {name: part})
+        MERGE (art)-[:LOCATED_IN]->(l)
+    } IN TRANSACTIONS OF $batch_size ROWS
+    """
+    with driver.session() as session:
+        # CALL {} IN TRANSACTIONS wajib di auto-commit transaction (session.run)
+        session.run(query, sep=LOCATION_SEPARATOR, unknown=UNKNOWN_LOCATION, batch_size=batch_size).consume()
+        linked = session.run("MATCH ()-[r:LOCATED_IN]->() RETURN count(r) AS n").single()["n"]
+    print(f"✅ {linked} relasi LOCATED_IN tersimpan.")
+    return linked
+
+
+def link_new_locations(driver, location_names):
+    # Sekali per Location baru (di worker, bukan per request API): CONTAINS
+    # cuma saringan, yang ditulis tetap yang bagiannya sama persis
+    names = sorted(set(location_names))
+    if not names:
+        return 0
+    query = """
+    MATCH (l:Location) WHERE l.name IN $names
+      // Location yang sudah punya LOCATED_IN sudah diurus stage penuh di ETL
+      AND NOT EXISTS { (:Artwork)-[:LOCATED_IN]->(l) }
+    CALL {
+        WITH l
+        MATCH (art:Artwork)
+        WHERE art.location CONTAINS l.name
+          AND l.name IN [part IN split(art.location, $sep) | trim(part)]
+        MERGE (art)-[:LOCATED_IN]->(l)
+        RETURN count(*) AS linked
+    } IN TRANSACTIONS OF 10 ROWS
+    RETURN sum(linked) AS linked
+    """
+    with driver.session() as session:
+        # CALL {} IN TRANSACTIONS wajib di auto-commit transaction (session.run)
+        record = session.run(query, names=names, sep=LOCATION_SEPARATOR).single()
+    linked = record["linked"] if record and record["linked"] is not None else 0
+    print(f"📍 {linked} artwork dihubungkan ke {len(names)} Location baru.")
+    return linked
+
+
+def compute_similar_artworks(driver, top_k=5, ids=None, writer=None):
+    """
+    Hitung tetangga terdekat tiap Artwork sekali saja setelah import,
+    lalu simpan sebagai relasi (:Artwork)-[:SIMILAR_TO {score}]->(:Artwork).
+    Endpoint /artwork/{id} tinggal baca relasi ini, tanpa vector search.
+
+    `ids=None` = semua Artwork; mode delta cuma kirim yang berubah.
+    """
+    print(f"🧲 Menghitung {top_k} Similar Artworks per karya...")
+
+    # Vector index diisi secara async oleh Neo4j, tunggu sampai ONLINE dulu
+    with driver.session() as session:
+        session.run("CALL db.awaitIndex('art_embeddings_index', 600)")
+        if ids is None:
+            ids = [r["id"] for r in session.run(
+                "MATCH (a:Artwork) WHERE a.embedding IS NOT NULL RETURN a.id AS id ORDER BY id"
+            )]
+
+    # +1 karena hasil pertama dari index pasti dirinya sendiri
+    query = """
+    UNWIND $batch AS art_id
+    MATCH (a:Artwork {id: art_id})
+    OPTIONAL MATCH (a)-[old:SIMILAR_TO]->()
+    DELETE old
+    WITH DISTINCT a
+    CALL db.index.vector.queryNodes('art_embeddings_index', $k, a.embedding)
+    YIELD node AS similar, score
+    WHERE similar <> a
+    WITH a, similar, score ORDER BY score DESC
+    WITH a, collect({node: similar, score: score})[..$top_k] AS top
+    SET a.similar_k = $top_k
+    WITH a, top
+    UNWIND top AS t
+    WITH a, t.node AS similar, t.score AS score
+    MERGE (a)-[r:SIMILAR_TO]->(similar)
+    SET r.score = score
+    """
+
+    total = len(ids)
+    start_time = time.time()
+    processed = 0
+
+    def on_progress(offset, rows):
+        nonlocal processed
+        processed += rows
+        print(f"   ⏳ Similar: {processed}/{total}", end='\r')
+
+    # SIMILAR_TO dua arah bisa bentrok antar writer: deadlock di-retry execute_write
+    if writer is None:
+        writer = BatchWriter(driver)
+    writer.write(query, [(ids, None)], on_progress=on_progress, k=top_k + 1, top_k=top_k)
+
+    print(f"\n✅ Selesai menghitung similar untuk {total} Artworks dalam {time.time() - start_time:.2f} detik.")
+    return total
+
+
+def refresh_movement_summaries(driver, period_names=None, top_artists=12, sample_artworks=8):
+    """
+    Simpan ringkasan per Period langsung di node-nya: top artist (urut jumlah
+    karya), beberapa karya representatif, dan total artist/karya. Endpoint
+    /movement/{name} tinggal baca satu node ini.
+
+    `period_names=None` = refresh semua Period; worker Wikidata cukup kirim
+    movement yang barusan disentuh.
+    """
+    print("🎨 Refresh ringkasan Movement/Period...")
+    query = """
+    MATCH (p:Period)
+    WHERE $names IS NULL OR p.name IN $names
+    CALL {
+        WITH p
+        CALL {
+            WITH p
+            // Tanpa grouping key, collect tetap balikin 1 baris ([]) walau movement kosong
+            MATCH (a:Artist)-[:PART_OF_MOVEMENT]->(p)
+            WITH a, COUNT { (:Artwork)-[:CREATED_BY]->(a) } AS works
+            ORDER BY works DESC, a.original_name
+            RETURN collect({name: a.original_name, works: works}) AS ranked
+        }
+        CALL {
+            // Satu karya (id terkecil) dari tiap top artist sebagai contoh
+            WITH p
+            MATCH (a:Artist)-[:PART_OF_MOVEMENT]->(p)
+            WITH a ORDER BY COUNT { (:Artwork)-[:CREATED_BY]->(a) } DESC, a.original_name
+            LIMIT $sample_artworks
+            MATCH (art:Artwork)-[:CREATED_BY]->(a)
+            WITH a, art ORDER BY art.id
+            WITH a, head(collect(art)) AS art
+            RETURN collect(art) AS samples
+        }
+        SET p.summary_artist_names = [r IN ranked[..$top_artists] | r.name],
+            p.summary_artist_counts = [r IN ranked[..$top_artists] | r.works],
+            p.summary_artwork_ids = [x IN samples | x.id],
+            p.summary_artwork_titles = [x IN samples | coalesce(x.title, '')],
+            p.summary_artwork_urls = [x IN samples | coalesce(x.image_url, '')],
+            p.artist_count = size(ranked),
+            p.artwork_count = reduce(total = 0, r IN ranked | total + r.works),
+            p.summary_refreshed_at = datetime()
+    } IN TRANSACTIONS OF 100 ROWS
+    """
+    with driver.session() as session:
+        session.run(
+            query, names=period_names, top_artists=top_artists, sample_artworks=sample_artworks
+        ).consume()
+    print(f"✅ Ringkasan movement diperbarui ({'semua' if period_names is None else len(period_names)} period).")
+
+
+if __name__ == "__main__":
+    driver = GraphDatabase.driver(URI, auth=AUTH)
+    try:
+        link_artwork_locations(driver)
+        refresh_movement_summaries(driver)
+        bump_data_version(driver, source="graph_stages")
+    finally:
+        driver.close()
@@ -3,6 +3,9 @@ import time
 from neo4j import GraphDatabase
 from SPARQLWrapper import SPARQLWrapper, JSON
 from dotenv import load_dotenv
+from graph_meta import bump_data_version
+from batch_writer import WriterPool
+from graph_stages import link_artwork_locations, refresh_movement_summaries
 
 load_dotenv()
 
@@ -18,6 +21,8 @@ sparql.addCustomHttpHeader("User-Agent", "CuratorApp/1.0 (mailto:admin@curator.a
 class WikidataPipeline:
     def __init__(self):
         self.driver = GraphDatabase.driver(URI, auth=AUTH)
+        # Tulis lewat managed transaction: transient error di-retry, bukan bikin worker mati
+        self.writers = WriterPool(self.driver)
 
     def close(self):
         self.driver.close()
@@ -52,8 +57,10 @@ class WikidataPipeline:
         return None
 
     def save_qid(self, name, qid):
-        with self.driver.session() as session:
-            session.run("MATCH (a:Artist {original_name: $name}) SET a.wikidata_id = $qid", name=name, qid=qid)
+        self.writers["qid"].write_rows(
+            "UNWIND $batch AS row MATCH (a:Artist {original_name: row.name}) SET a.wikidata_id = row.qid",
+            [{"name": name, "qid": qid}],
+        )
 
     # --- FASE 2: ENRICH ARTIST (Ambil Data Penting Saja) ---
     def get_unenriched_artists(self):
@@ -90,38 +97,49 @@ class WikidataPipeline:
             return []
 
     def save_artist_enrichment(self, name, data):
-        with self.driver.session() as session:
-            session.run("MATCH (a:Artist {original_name: $name}) SET a.enriched = true", name=name)
-
-            for item in data:
-                # 1. FOTO
-                if "image" in item:
-                    session.run("MATCH (a:Artist {original_name: $name}) SET a.image_url = $url", name=name, url=item["image"]["value"])
-
-                # 2. MOVEMENT (Buat Node Period Baru)
-                if "movementLabel" in item:
-                    move = item["movementLabel"]["value"]
-                    session.run("""
-                        MATCH (a:Artist {original_name: $name})
-                        MERGE (p:Period {name: $move})
-                        MERGE (a)-[:PART_OF_MOVEMENT]->(p)
-                    """, name=name, move=move)
-
-                # 3. LOCATION (Buat Node Location Baru)
-                loc_name = item.get("workLocLabel", {}).get("value") or item.get("birthPlaceLabel", {}).get("value")
-                if loc_name:
-                    session.run("""
-                        MATCH (a:Artist {original_name: $name})
-                        SET a.base_location = $loc
-                        MERGE (l:Location {name: $loc})
-                        MERGE (a)-[:BASED_IN]->(l)
-                    """, name=name, loc=loc_name)
-                
-                # 4. GURU/MURID (Simpan sebagai relasi teks dulu agar tidak ribet bikin node baru)
-                if "teacherLabel" in item:
-                    session.run("MATCH (a:Artist {original_name: $name}) SET a.teacher_name = $t", name=name, t=item["teacherLabel"]["value"])
-                if "studentLabel" in item:
-                    session.run("MATCH (a:Artist {original_name: $name}) SET a.student_name = $s", name=name, s=item["studentLabel"]["value"])
+        # Semua baris hasil SPARQL dalam satu transaksi (dulu 1 query per field per baris)
+        rows = []
+        for item in data:
+            loc_name = item.get("workLocLabel", {}).get("value") or item.get("birthPlaceLabel", {}).get("value")
+            rows.append({
+                "image": item.get("image", {}).get("value"),             # 1. FOTO
+                "movement": item.get("movementLabel", {}).get("value"),  # 2. MOVEMENT
+                "loc": loc_name,                                         # 3. LOCATION
+                "teacher": item.get("teacherLabel", {}).get("value"),    # 4. GURU/MURID
+                "student": item.get("studentLabel", {}).get("value"),
+            })
+
+        # Period & Location dibuat sebagai node baru; guru/murid disimpan sebagai teks dulu
+        # agar tidak ribet bikin node baru. Baris kosong tetap dikirim biar enriched ter-set.
+        query = """
+        MATCH (a:Artist {original_name: $name})
+        SET a.enriched = true
+        WITH a
+        UNWIND $batch AS row
+        SET a.image_url = coalesce(row.image, a.image_url),
+            a.base_location = coalesce(row.loc, a.base_location),
+            a.teacher_name = coalesce(row.teacher, a.teacher_name),
+            a.student_name = coalesce(row.student, a.student_name)
+        FOREACH (_ IN CASE WHEN row.movement IS NULL THEN [] ELSE [1] END |
+            MERGE (p:Period {name: row.movement})
+            MERGE (a)-[:PART_OF_MOVEMENT]->(p)
+        )
+        FOREACH (_ IN CASE WHEN row.loc IS NULL THEN [] ELSE [1] END |
+            MERGE (l:Location {name: row.loc})
+            MERGE (a)-[:BASED_IN]->(l)
+        )
+        """
+        self.writers["artist"].write_rows(query, rows or [{}], name=name)
+
+        # Ringkasan movement yang barusan dapat anggota baru harus dihitung ulang
+        movements = sorted({row["movement"] for row in rows if row["movement"]})
+        if movements:
+            refresh_movement_summaries(self.driver, period_names=movements)
+
+        # Location baru belum punya LOCATED_IN (stage ETL jalan sebelum node-nya ada)
+        locations = [row["loc"] for row in rows if row["loc"]]
+        if locations:
+            link_artwork_locations(self.driver, location_names=locations)
 
     # --- FASE 3: ENRICH AUXILIARY NODES (Location & Period) ---
     def get_unenriched_aux_nodes(self):
@@ -157,17 +175,17 @@ class WikidataPipeline:
 
     def save_aux_enrichment(self, name, node_type, data):
         query = f"""
-        MATCH (n:{node_type} {{name: $name}})
+        UNWIND $batch AS row
+        MATCH (n:{node_type} {{name: row.name}})
         SET n.enriched = true,
-            n.description = $desc,
-            n.image_url = $image
+            n.description = row.desc,
+            n.image_url = row.image
         """
-        with self.driver.session() as session:
-            session.run(query, 
-                name=name, 
-                desc=data.get("desc", {}).get("value", ""),
-                image=data.get("image", {}).get("value", "")
-            )
+        self.writers["aux"].write_rows(query, [{
+            "name": name,
+            "desc": data.get("desc", {}).get("value", ""),
+            "image": data.get("image", {}).get("value", ""),
+        }])
 
     # --- MAIN RUNNER ---
     def run(self):
@@ -183,10 +201,15 @@ class WikidataPipeline:
                 self.save_aux_enrichment(node['name'], node['type'], data)
             else:
                 # Tandai enriched meski null biar gak dicari lagi
-                with self.driver.session() as session:
-                    session.run(f"MATCH (n:{node['type']} {{name: $name}}) SET n.enriched = true", name=node['name'])
+                self.writers["aux_empty"].write_rows(
+                    f"UNWIND $batch AS row MATCH (n:{node['type']} {{name: row.name}}) SET n.enriched = true",
+                    [{"name": node['name']}],
+                )
             time.sleep(0.5)
 
+        if aux_nodes:
+            bump_data_version(self.driver, source="wikidata")
+
         print("\n🏁 Selesai satu putaran! (Jalankan lagi nanti jika masih ada sisa)")
 
 if __name__ == "__main__":
@@ -3,6 +3,9 @@ import time
 from neo4j import GraphDatabase
 from SPARQLWrapper import SPARQLWrapper, JSON
 from dotenv import load_dotenv
+from graph_meta import bump_data_version
+from graph_stages import refresh_movement_summaries
+from batch_writer import WriterPool
 
 load_dotenv()
 
@@ -16,6 +19,7 @@ sparql.addCustomHttpHeader("User-Agent", "CuratorApp/BatchWorker/1.0 (mailto:adm
 class WikidataBatchPipeline:
     def __init__(self):
         self.driver = GraphDatabase.driver(URI, auth=AUTH)
+        self.writers = WriterPool(self.driver)
 
     def close(self):
         self.driver.close()
@@ -82,7 +86,7 @@ class WikidataBatchPipeline:
     def save_batch_qids(self, qid_map):
         if not qid_map: return
         
-        # Update Neo4j sekaligus (pakai UNWIND biar 1 transaksi)
+        # Update Neo4j sekaligus (pakai UNWIND biar 1 transaksi, di-retry kalau transient error)
         params = [{"name": k, "qid": v} for k, v in qid_map.items()]
         
         query = """
@@ -90,8 +94,7 @@ class WikidataBatchPipeline:
         MATCH (a:Artist {original_name: row.name})
         SET a.wikidata_id = row.qid
         """
-        with self.driver.session() as session:
-            session.run(query, batch=params)
+        self.writers["qids"].write_rows(query, params)
 
     # --- ENRICHMENT BATCH (Ambil Foto & Desc Sekaligus) ---
     
@@ -144,33 +147,40 @@ class WikidataBatchPipeline:
     def save_batch_details(self, data_map):
         if not data_map: return
 
-        # Kita update satu-satu di loop lokal karena logic-nya agak kompleks (conditional update)
-        with self.driver.session() as session:
-            for qid, info in data_map.items():
-                # Tandai enriched
-                session.run("MATCH (a:Artist {wikidata_id: $qid}) SET a.enriched = true", qid=qid)
-                
-                if "image" in info:
-                    session.run("MATCH (a:Artist {wikidata_id: $qid}) SET a.image_url = $url", qid=qid, url=info["image"])
-                
-                if "desc" in info:
-                    session.run("""
-                        MATCH (a:Artist {wikidata_id: $qid}) 
-                        WHERE a.bio IS NULL OR a.bio = 'No biography available.' 
-                        SET a.bio = $d
-                    """, qid=qid, d=info["desc"])
-                    
-                if "movement" in info:
-                    session.run("""
-                        MATCH (a:Artist {wikidata_id: $qid})
-                        MERGE (p:Period {name: $mov})
-                        MERGE (a)-[:PART_OF_MOVEMENT]->(p)
-                    """, qid=qid, mov=info["movement"])
+        # Satu UNWIND untuk semua artist (dulu 1-4 query per artist); update
+        # kondisional pakai coalesce/CASE, movement opsional pakai FOREACH
+        rows = [
+            {"qid": qid, "image": info.get("image"), "desc": info.get("desc"), "movement": info.get("movement")}
+            for qid, info in data_map.items()
+        ]
+        query = """
+        UNWIND $batch AS row
+        MATCH (a:Artist {wikidata_id: row.qid})
+        SET a.enriched = true,
+            a.image_url = coalesce(row.image, a.image_url),
+            a.bio = CASE
+                WHEN row.desc IS NOT NULL AND (a.bio IS NULL OR a.bio = 'No biography available.') THEN row.desc
+                ELSE a.bio
+            END
+        FOREACH (_ IN CASE WHEN row.movement IS NULL THEN [] ELSE [1] END |
+            MERGE (p:Period {name: row.movement})
+            MERGE (a)-[:PART_OF_MOVEMENT]->(p)
+        )
+        """
+        # Partisi per movement: MERGE Period yang sama tidak ditulis paralel
+        self.writers["details"].write_rows(query, rows, partition_key=lambda row: row["movement"])
+
+        # Ringkasan movement yang barusan dapat anggota baru harus dihitung ulang
+        movements = sorted({info["movement"] for info in data_map.values() if "movement" in info})
+        if movements:
+            refresh_movement_summaries(self.driver, period_names=movements)
 
     def run(self):
         print("🏎️  Wikidata BATCH Worker dimulai...")
         
         while True:
+            wrote_any = False
+
             # 1. LINKING BATCH
             unlinked = self.get_unlinked_artists_batch(batch_size=50)
             if unlinked:
@@ -178,6 +188,7 @@ class WikidataBatchPipeline:
                 found_map = self.fetch_batch_qids(unlinked)
                 if found_map:
                     self.save_batch_qids(found_map)
+                    wrote_any = True
                     print(f"   ✅ Matched {len(found_map)}/{len(unlinked)} IDs.")
                 else:
                     print("   ⚠️  No matches in this batch.")
@@ -188,8 +199,12 @@ class WikidataBatchPipeline:
                 print(f"✨ Processing batch of {len(unenriched)} artists for Enrichment...")
                 details_map = self.fetch_batch_details(unenriched)
                 self.save_batch_details(details_map)
+                wrote_any = wrote_any or bool(details_map)
                 print(f"   ✅ Enriched {len(details_map)} artists.")
 
+            if wrote_any:
+                bump_data_version(self.driver, source="wikidata_batch")
+
             if not unlinked and not unenriched:
                 print("🏁 Semua data sudah diproses! Tidur dulu...")
                 break